@@ -0,0 +1,133 @@
+import asyncio
+import json
+from typing import Dict, Optional
+
+from .config import settings
+
+ROUTE_CLASSES = ("read", "write", "auth", "upload", "upload_chunk", "admin")
+
+# 需要 PIL 解码的上传路由；断点续传的其余路由只读写会话和临时文件
+_IMAGE_UPLOAD_PATHS = ("/api/upload/image", "/api/upload/images")
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """根据请求方法和路径确定路由类别，返回 None 表示不做准入控制"""
+    if not path.startswith("/api/") or path.startswith("/api/system/"):
+        return None
+    if path.endswith("/stream"):
+        return None  # 推送长连接有独立的连接数限制
+    if path.startswith("/api/auth/"):
+        return "auth"  # bcrypt 计算密集
+    if path in _IMAGE_UPLOAD_PATHS or (path.startswith("/api/upload/") and path.endswith("/complete")):
+        return "upload"  # PIL 解码和磁盘写入
+    if method == "PUT" and path.startswith("/api/upload/sessions/"):
+        # 分片传输受网络速度限制、不做图片处理，单独限流，慢速传输不占用图片处理的名额
+        return "upload_chunk"
+    if path.startswith("/api/admin/"):
+        return "admin"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+class RouteClassLimiter:
+    """单个路由类别的并发限制器：超出并发的请求进入有界队列，队列满或等待超时则拒绝"""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        # 计数器
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self, timeout: float) -> bool:
+        """申请执行名额，返回 False 表示应当拒绝"""
+        if self._semaphore.locked() and self.waiting >= self.queue_size:
+            self.rejected_queue_full += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        """释放执行名额"""
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected": self.rejected_queue_full + self.rejected_timeout,
+        }
+
+limiters: Dict[str, RouteClassLimiter] = {
+    name: RouteClassLimiter(
+        name,
+        concurrency=settings.admission_concurrency.get(name, 16),
+        queue_size=settings.admission_queue_size.get(name, 64),
+    )
+    for name in ROUTE_CLASSES
+}
+
+def get_admission_stats() -> dict:
+    """获取各路由类别的队列深度和拒绝计数"""
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+class AdmissionControlMiddleware:
+    """按路由类别做准入控制的 ASGI 中间件，过载时快速返回 503 而不是无限排队"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_request(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[route_class]
+        if not await limiter.acquire(settings.admission_queue_timeout):
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "服务繁忙，请稍后重试"}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.admission_retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
\ No newline at end of file
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from typing import Callable, List
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+_tasks: List[asyncio.Task] = []
+
+async def _run_periodic(name: str, interval: float, func: Callable[[], None], run_immediately: bool):
+    if not run_immediately:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception("后台任务 %s 执行失败", name)
+        await asyncio.sleep(interval)
+
+def start_periodic(name: str, interval: float, func: Callable[[], None], run_immediately: bool = False):
+    """在事件循环中启动周期性后台任务，func 在线程池中执行"""
+    task = asyncio.create_task(_run_periodic(name, interval, func, run_immediately), name=name)
+    _tasks.append(task)
+    return task
+
+async def _run_once(name: str, func: Callable[[], None]):
+    try:
+        await run_in_threadpool(func)
+    except Exception:
+        logger.exception("后台任务 %s 执行失败", name)
+
+def start_once(name: str, func: Callable[[], None]):
+    """在事件循环中启动只执行一次的后台任务，func 在线程池中执行"""
+    task = asyncio.create_task(_run_once(name, func), name=name)
+    _tasks.append(task)
+    return task
+
+async def stop_all():
+    """取消所有后台任务"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
\ No newline at end of file
@@ -0,0 +1,428 @@
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_sqlite_path
+from app.core.recompress import RateLimiter
+
+SNAPSHOT_PREFIX = "posts-"
+MANIFEST_NAME = "uploads.manifest.json"
+LOCK_NAME = ".backup.lock"
+JOB_NAME = "backup.job.json"
+
+class BackupInProgress(Exception):
+    pass
+
+@dataclass
+class BackupReport:
+    snapshot: str = ""
+    db_size: int = 0
+    journal_mode: str = ""
+    restarts: int = 0  # 备份期间有写入提交时 SQLite 会从头重新复制
+    final_step_pages: int = 0  # 完成时每步复制的页数，-1 表示一步复制整个库
+    integrity: str = ""
+    files_copied: int = 0
+    files_skipped: int = 0
+    bytes_copied: int = 0
+    db_seconds: float = 0.0
+    files_seconds: float = 0.0
+    elapsed: float = 0.0
+    write_latency_ms: Dict[str, float] = field(default_factory=dict)  # 探测线程测得的写锁等待（--probe）
+    commit_latency_ms: Dict[str, float] = field(default_factory=dict)  # 备份期间本进程 API 事务的提交耗时
+    errors: Dict[str, str] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+# 写入延迟探测
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"samples": 0}
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+class WriteLatencyProbe(threading.Thread):
+    """周期性获取一次写锁后立即回滚，测量写事务需要等待多久
+
+    不修改数据，不会导致备份重启。回滚日志模式下，备份每一步持有的共享锁会推迟写事务提交；
+    WAL 模式下读写互不阻塞。
+    """
+
+    def __init__(self, db_path: str, interval: float = 0.02):
+        super().__init__(name="backup-latency-probe", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            while not self._stopped.is_set():
+                began = time.perf_counter()
+                conn.execute("BEGIN EXCLUSIVE")
+                conn.execute("ROLLBACK")
+                self.samples.append((time.perf_counter() - began) * 1000)
+                self._stopped.wait(self.interval)
+        finally:
+            conn.close()
+
+    def stop(self) -> Dict[str, float]:
+        self._stopped.set()
+        self.join()
+        return _summarize(self.samples)
+
+class CommitLatencyMonitor:
+    """记录本进程中会话提交的耗时（从 before_commit 到 after_commit，含刷新和等待写锁）
+
+    只挂在已有的提交上，不额外访问数据库，可以在线上备份期间一直开启。
+    多进程部署时只统计执行备份的进程。
+    """
+
+    MAX_SAMPLES = 100000
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def _before_commit(self, db: Session):
+        db.info["commit_started"] = time.perf_counter()
+
+    def _after_commit(self, db: Session):
+        started = db.info.pop("commit_started", None)
+        if started is not None and len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append((time.perf_counter() - started) * 1000)
+
+    def start(self):
+        event.listen(Session, "before_commit", self._before_commit)
+        event.listen(Session, "after_commit", self._after_commit)
+
+    def stop(self) -> Dict[str, float]:
+        event.remove(Session, "before_commit", self._before_commit)
+        event.remove(Session, "after_commit", self._after_commit)
+        return _summarize(self.samples)
+
+# 数据库
+
+class _Restarted(Exception):
+    pass
+
+def backup_database(
+    source_path: str,
+    target_path: str,
+    pages: int = 256,
+    sleep: float = 0.05,
+    max_restarts: int = 8,
+    report: Callable[[str], None] = print
+) -> BackupReport:
+    """用 SQLite 在线备份 API 分步复制数据库，每步之后暂停，让 API 的写入继续进行
+
+    WAL 模式下所有步骤在同一个读事务（快照）中完成，不会重启，也不阻塞写入。
+    回滚日志模式下每一步只短暂持有共享锁，但步骤之间有写入提交时需要从头复制：
+    每次重启把步长扩大 4 倍，超过 max_restarts 次后一步复制完，保证备份能结束。
+    """
+    result = BackupReport()
+    source = sqlite3.connect(source_path, isolation_level=None, timeout=30)
+    source.execute("PRAGMA busy_timeout = 30000")
+    tmp_path = target_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        result.journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0].lower()
+        snapshot = result.journal_mode == "wal"
+        if not snapshot:
+            result.warnings.append(
+                f"数据库处于 {result.journal_mode} 模式而不是 WAL，备份期间的写入提交会使备份重新开始，"
+                "最后可能一步复制整个库并在此期间阻塞写入；请开启 SQLITE_WAL 后重启 API"
+            )
+            report(f"警告：{result.warnings[-1]}")
+        if snapshot:
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1")  # 开启读事务，固定快照
+
+        step = pages
+        while True:
+            last_remaining = None
+
+            def progress(status, remaining, total):
+                nonlocal last_remaining
+                if last_remaining is not None and remaining >= last_remaining:
+                    raise _Restarted()  # 剩余页数没有减少：步骤之间有写入提交，SQLite 从头开始了
+                last_remaining = remaining
+                if remaining and sleep:
+                    time.sleep(sleep)  # 两步之间不持有任何锁
+
+            try:
+                # sleep 是遇到 SQLITE_BUSY 时的重试间隔，默认 250 毫秒太长
+                source.backup(target, pages=step, progress=progress, sleep=0.005)
+                break
+            except _Restarted:
+                result.restarts += 1
+                step = -1 if result.restarts >= max_restarts else step * 4
+                report(f"备份期间有写入提交，重新复制（第 {result.restarts} 次，每步 {step} 页）")
+        result.final_step_pages = step
+
+        if snapshot:
+            source.execute("COMMIT")
+        result.integrity = target.execute("PRAGMA integrity_check").fetchone()[0]
+        target.execute("PRAGMA journal_mode=DELETE")  # 快照是单个文件，不带 -wal/-shm
+    finally:
+        target.close()
+        source.close()
+
+    if result.integrity != "ok":
+        os.remove(tmp_path)
+        raise RuntimeError(f"备份校验失败：{result.integrity}")
+    os.replace(tmp_path, target_path)
+    result.snapshot = target_path
+    result.db_size = os.path.getsize(target_path)
+    return result
+
+def prune_snapshots(dest: str, keep: int) -> List[str]:
+    """只保留最新的 keep 个数据库快照（上传文件目录由所有快照共用，不清理）"""
+    snapshots = sorted(
+        name for name in os.listdir(dest) if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".db")
+    )
+    removed = snapshots[:-keep] if keep > 0 else []
+    for name in removed:
+        os.remove(os.path.join(dest, name))
+    return removed
+
+# 上传文件
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _copy_verified(source: str, target: str) -> str:
+    """复制到临时文件并重新读取校验，通过后再原子替换，返回 SHA-256"""
+    tmp_path = target + ".tmp"
+    digest = hashlib.sha256()
+    with open(source, "rb") as fin, open(tmp_path, "wb") as fout:
+        for chunk in iter(lambda: fin.read(1024 * 1024), b""):
+            digest.update(chunk)
+            fout.write(chunk)
+        fout.flush()
+        os.fsync(fout.fileno())
+    checksum = digest.hexdigest()
+    if _sha256(tmp_path) != checksum:
+        os.remove(tmp_path)
+        raise IOError("副本校验失败")
+    os.replace(tmp_path, target)
+    return checksum
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path: str, manifest: Dict[str, dict]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def copy_uploads(
+    upload_path: str,
+    dest: str,
+    result: BackupReport,
+    max_bytes_per_second: Optional[float] = None,
+    report: Callable[[str], None] = print
+):
+    """按清单增量复制上传文件：大小和修改时间与清单一致且副本存在的文件跳过
+
+    只增不删：已删除的文件仍保留在备份中，旧快照引用的图片始终可以恢复。
+    """
+    files_dest = os.path.join(dest, "uploads")
+    os.makedirs(files_dest, exist_ok=True)
+    manifest_path = os.path.join(dest, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    limiter = RateLimiter(max_bytes_per_second)
+
+    with os.scandir(upload_path) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue  # 隐藏文件包括重新压缩等工具的临时文件
+            stat = entry.stat()
+            target = os.path.join(files_dest, entry.name)
+            known = manifest.get(entry.name)
+            if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime \
+                    and os.path.exists(target) and os.path.getsize(target) == stat.st_size:
+                result.files_skipped += 1
+                continue
+            limiter.acquire(stat.st_size)
+            try:
+                checksum = _copy_verified(entry.path, target)
+            except OSError as exc:
+                result.errors[entry.name] = str(exc)
+                continue
+            manifest[entry.name] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": checksum}
+            result.files_copied += 1
+            result.bytes_copied += stat.st_size
+            if result.files_copied % 500 == 0:
+                save_manifest(manifest_path, manifest)  # 中断后已复制的文件不必重来
+                report(f"已复制 {result.files_copied} 个文件（{result.bytes_copied / 1024 / 1024:.1f} MB）")
+    save_manifest(manifest_path, manifest)
+
+# 备份锁：备份目录下的文件锁，命令行和各个 API 进程之间互斥，进程退出时自动释放
+
+def acquire_lock(dest: str) -> int:
+    """获取备份锁并返回文件描述符，已有备份在进行时抛出 BackupInProgress"""
+    os.makedirs(dest, exist_ok=True)
+    fd = os.open(os.path.join(dest, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise BackupInProgress()
+    return fd
+
+def release_lock(fd: int):
+    os.close(fd)  # 关闭即释放锁
+
+@contextmanager
+def backup_lock(dest: str):
+    fd = acquire_lock(dest)
+    try:
+        yield
+    finally:
+        release_lock(fd)
+
+# 完整备份
+
+def run_backup(
+    dest: Optional[str] = None,
+    pages: int = 256,
+    sleep: float = 0.05,
+    max_bytes_per_second: Optional[float] = None,
+    keep: Optional[int] = None,
+    probe: bool = False,
+    report: Callable[[str], None] = print,
+    lock: bool = True
+) -> BackupReport:
+    """在线备份数据库和上传目录
+
+    先备份数据库、再复制上传文件：上传都是先写文件再写数据库记录，所以快照引用的文件一定已被复制。
+    probe 在备份期间测量写锁等待，探测本身每 20 毫秒获取一次排他锁，会给线上增加负载，只在排查时开启。
+    lock 为 False 表示调用方已持有备份锁。
+    """
+    dest = dest or settings.backup_path
+    if lock:
+        with backup_lock(dest):
+            return run_backup(dest, pages, sleep, max_bytes_per_second, keep, probe, report, lock=False)
+
+    keep = settings.backup_keep if keep is None else keep
+    os.makedirs(dest, exist_ok=True)
+    db_path = get_sqlite_path()
+    start = time.monotonic()
+
+    latency_probe = WriteLatencyProbe(db_path) if probe else None
+    if latency_probe:
+        latency_probe.start()
+    try:
+        name = f"{SNAPSHOT_PREFIX}{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.db"
+        result = backup_database(db_path, os.path.join(dest, name), pages=pages, sleep=sleep, report=report)
+    finally:
+        if latency_probe:
+            write_latency = latency_probe.stop()
+    if latency_probe:
+        result.write_latency_ms = write_latency
+    result.db_seconds = time.monotonic() - start
+    report(f"数据库已备份到 {result.snapshot}（{result.db_size / 1024 / 1024:.1f} MB，{result.db_seconds:.1f} 秒）")
+
+    began = time.monotonic()
+    if os.path.isdir(settings.upload_path):
+        copy_uploads(settings.upload_path, dest, result, max_bytes_per_second, report)
+    result.files_seconds = time.monotonic() - began
+
+    prune_snapshots(dest, keep)
+    result.elapsed = time.monotonic() - start
+    return result
+
+# 管理接口触发的后台备份：状态写入备份目录下的文件，多进程部署时任一进程都能查询
+
+_IDLE_JOB = {"running": False, "started_at": None, "finished_at": None, "report": None, "error": None}
+
+def _job_path() -> str:
+    return os.path.join(settings.backup_path, JOB_NAME)
+
+def _save_job(job: dict):
+    tmp_path = _job_path() + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, _job_path())
+
+def _run_job(job: dict, lock_fd: int):
+    # 不启动写锁探测，改为统计备份期间 API 自身提交的耗时，不给线上增加负载
+    monitor = CommitLatencyMonitor()
+    monitor.start()
+    try:
+        try:
+            result = run_backup(
+                max_bytes_per_second=settings.backup_max_mb_per_sec * 1024 * 1024 or None,
+                report=lambda message: None,
+                lock=False
+            )
+        finally:
+            commit_latency = monitor.stop()
+        result.commit_latency_ms = commit_latency
+        job.update(report=asdict(result), error=None)
+    except Exception as exc:
+        job.update(report=None, error=str(exc))
+    finally:
+        job.update(running=False, finished_at=datetime.now(timezone.utc).isoformat())
+        try:
+            _save_job(job)
+        finally:
+            release_lock(lock_fd)
+
+def start_backup_job() -> bool:
+    """在后台线程中开始备份；已有备份（包括其他进程和命令行）在进行时返回 False"""
+    try:
+        lock_fd = acquire_lock(settings.backup_path)
+    except BackupInProgress:
+        return False
+    try:
+        job = dict(_IDLE_JOB, running=True, started_at=datetime.now(timezone.utc).isoformat())
+        _save_job(job)
+        threading.Thread(target=_run_job, args=(job, lock_fd), name="backup", daemon=True).start()
+    except Exception:
+        release_lock(lock_fd)
+        raise
+    return True
+
+def get_backup_job() -> dict:
+    try:
+        with open(_job_path(), encoding="utf-8") as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return dict(_IDLE_JOB)
+    if job.get("running"):
+        # 执行备份的进程异常退出时锁已释放，但状态文件仍显示进行中
+        try:
+            lock_fd = acquire_lock(settings.backup_path)
+        except BackupInProgress:
+            return job
+        release_lock(lock_fd)
+        job.update(running=False, error=job.get("error") or "备份进程已退出，备份未完成")
+    return job
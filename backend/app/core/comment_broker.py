@@ -0,0 +1,206 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set
+
+from . import invalidation
+from .config import settings
+
+class TooManyConnections(Exception):
+    """推送连接数超过限制"""
+
+class Subscription:
+    """一个推送连接：有界队列提供背压，积压超过上限时标记为溢出"""
+
+    def __init__(self, post_id: str, queue_size: int, start_seq: int = 0):
+        self.post_id = post_id
+        self.start_seq = start_seq  # 订阅时帖子的事件序号，之后的事件都会进入队列
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, event: dict):
+        """在连接所在的事件循环中执行"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+class PostChannel:
+    """单个帖子的订阅者集合和最近事件缓冲区"""
+
+    def __init__(self, buffer_size: int):
+        self.seq = 0
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.subscribers: Set[Subscription] = set()
+
+def format_event(event_type: str, data, event_id: Optional[str] = None) -> str:
+    """格式化为 SSE 消息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+class CommentBroker:
+    """进程内的评论事件分发器
+
+    评论的创建、编辑、隐藏和删除由 CRUD 层发布，分发给订阅该帖子的所有推送连接。
+    其他进程的写入只通过失效广播得知帖子有变化，此时发送 reset 事件。
+    每个帖子保留最近的事件，客户端断线重连时带上游标即可补发期间错过的事件；
+    游标失效（进程重启、缓冲区已滚动）时发送 reset 事件，客户端应重新拉取完整评论列表。
+    """
+
+    def __init__(self):
+        # 游标带上进程标识，重连到其他进程时可以识别并要求重新拉取
+        self.epoch = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._channels: "OrderedDict[str, PostChannel]" = OrderedDict()
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflowed = 0
+        self.rejected = 0
+
+    def is_watched(self, post_id: str) -> bool:
+        """帖子是否有推送连接或续传缓冲区，没有时 CRUD 层无需序列化事件"""
+        return post_id in self._channels
+
+    def subscribe(self, post_id: str) -> Subscription:
+        with self._lock:
+            channel = self._channels.get(post_id)
+            if self.connections >= settings.comment_stream_max_connections or (
+                channel is not None and len(channel.subscribers) >= settings.comment_stream_max_per_post
+            ):
+                self.rejected += 1
+                raise TooManyConnections()
+
+            if channel is None:
+                channel = PostChannel(settings.comment_stream_buffer_size)
+                self._channels[post_id] = channel
+            self._channels.move_to_end(post_id)
+
+            subscription = Subscription(post_id, settings.comment_stream_queue_size, start_seq=channel.seq)
+            channel.subscribers.add(subscription)
+            self.connections += 1
+            self._evict()
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            channel = self._channels.get(subscription.post_id)
+            if channel is not None and subscription in channel.subscribers:
+                channel.subscribers.discard(subscription)
+                self.connections -= 1
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用且没有连接的帖子缓冲区（需持有锁）"""
+        if len(self._channels) <= settings.comment_stream_max_posts:
+            return
+        for post_id in list(self._channels.keys()):
+            if len(self._channels) <= settings.comment_stream_max_posts:
+                break
+            if not self._channels[post_id].subscribers:
+                del self._channels[post_id]
+
+    def publish(self, post_id: str, event_type: str, data: dict):
+        """发布事件，可以在任意线程调用"""
+        with self._lock:
+            channel = self._channels.get(post_id)
+            if channel is None:
+                return
+            channel.seq += 1
+            event = {"seq": channel.seq, "type": event_type, "data": data}
+            channel.buffer.append(event)
+            subscribers = list(channel.subscribers)
+            self.published += 1
+
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+    def reset(self, post_id: str):
+        """帖子在其他进程中有变化：事件内容不可得，通知客户端重新拉取"""
+        if self.is_watched(post_id):
+            self.publish(post_id, "reset", {})
+
+    def cursor(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def replay(self, post_id: str, cursor: str) -> Optional[List[dict]]:
+        """获取游标之后的事件，游标无法续传时返回 None"""
+        try:
+            epoch, seq = cursor.rsplit("-", 1)
+            seq = int(seq)
+        except ValueError:
+            return None
+        if epoch != self.epoch:
+            return None
+
+        with self._lock:
+            channel = self._channels.get(post_id)
+            if channel is None or seq > channel.seq:
+                return None
+            events = list(channel.buffer)
+        if events and events[0]["seq"] > seq + 1:
+            return None  # 缓冲区已滚动，中间有事件丢失
+        return [event for event in events if event["seq"] > seq]
+
+    async def event_stream(self, subscription: Subscription, cursor: Optional[str], request):
+        """生成 SSE 消息流，连接断开时自动退订"""
+        try:
+            # 从订阅时的序号开始：订阅之后、生成器开始之前发布的事件已在队列中，不能跳过
+            last_seq = subscription.start_seq
+            if cursor:
+                events = self.replay(subscription.post_id, cursor)
+                if events is None:
+                    yield format_event("reset", {}, self.cursor(last_seq))
+                else:
+                    for event in events:
+                        yield format_event(event["type"], event["data"], self.cursor(event["seq"]))
+                    if events:
+                        last_seq = max(last_seq, events[-1]["seq"])
+            yield format_event("ready", {}, self.cursor(last_seq))
+
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.comment_stream_heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if subscription.overflowed:
+                    # 客户端消费太慢，丢弃积压并要求重新拉取
+                    self.overflowed += 1
+                    yield format_event("reset", {}, self.cursor(event["seq"]))
+                    break
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                self.delivered += 1
+                yield format_event(event["type"], event["data"], self.cursor(event["seq"]))
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "watched_posts": len(self._channels),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflowed": self.overflowed,
+            "rejected": self.rejected,
+        }
+
+comment_broker = CommentBroker()
+
+invalidation.subscribe_remote(invalidation.POST_CHANGED, comment_broker.reset)
\ No newline at end of file
@@ -5,6 +5,7 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # 数据库配置
     database_url: str = "sqlite:///./posts.db"
+    sqlite_wal: bool = True  # SQLite 使用 WAL 模式：读不阻塞写，在线备份不阻塞 API 写入
     
     # JWT配置
     secret_key: str = os.getenv("SECRET_KEY", "your-super-secret-key-change-this-in-production")
@@ -16,6 +17,77 @@ class Settings(BaseSettings):
     max_file_size: int = 20 * 1024 * 1024  # 20MB
     allowed_extensions: list = [".jpg", ".jpeg", ".png", ".gif"]
     
+    # 准入控制配置（按路由类别限制并发和排队长度）
+    admission_enabled: bool = True
+    admission_concurrency: dict = {"read": 64, "write": 16, "auth": 4, "upload": 4, "upload_chunk": 16, "admin": 8}
+    admission_queue_size: dict = {"read": 256, "write": 64, "auth": 16, "upload": 8, "upload_chunk": 32, "admin": 16}
+    admission_queue_timeout: float = 5.0  # 排队最长等待秒数
+    admission_retry_after: int = 1  # 503 响应中的 Retry-After 秒数
+    
+    # 启动预热配置
+    warmup_enabled: bool = True
+    warmup_feed: bool = True  # 预热首页帖子列表
+    
+    # 多进程与缓存失效广播配置
+    workers: int = 1
+    invalidation_backend: str = "auto"  # auto / local / sqlite / redis，auto 在多进程时使用 sqlite
+    invalidation_poll_interval: float = 0.2  # sqlite 后端轮询间隔（秒）
+    invalidation_retention: int = 300  # sqlite 后端事件保留时间（秒）
+    invalidation_redis_url: str = "redis://localhost:6379/0"  # redis 后端需要额外安装 redis 包
+    
+    # 评论推送（SSE）配置
+    comment_stream_max_connections: int = 1000  # 单进程最大推送连接数
+    comment_stream_max_per_post: int = 200  # 单个帖子最大推送连接数
+    comment_stream_queue_size: int = 100  # 单连接待发送事件上限，超出则要求客户端重新拉取
+    comment_stream_buffer_size: int = 200  # 每个帖子保留的最近事件数，用于断线续传
+    comment_stream_max_posts: int = 1000  # 保留续传缓冲区的帖子数上限
+    comment_stream_heartbeat: float = 15.0  # 心跳间隔（秒）
+    
+    # 读合并（single-flight）配置：并发的相同帖子详情请求共享一次查询和序列化
+    single_flight_enabled: bool = True
+    post_detail_cache_ttl: float = 0.0  # 查询完成后的微缓存秒数，0 表示不缓存；写操作会使缓存立即失效
+    post_detail_cache_max_entries: int = 1000
+    
+    # 浏览计数配置：浏览数先在内存中累加，定期批量写回
+    view_flush_interval: float = 10.0  # 写回周期（秒），也是进程崩溃时最多丢失的浏览数时间窗口
+    view_counter_shards: int = 16  # 内存计数的分片（锁）数
+    
+    # 热门帖子配置
+    trending_half_life_hours: float = 24.0  # 活跃度半衰期
+    trending_decay_interval: int = 600  # 后台衰减周期（秒）
+    trending_post_weight: float = 1.0  # 发帖计入的活跃度
+    trending_comment_weight: float = 1.0  # 每条评论计入的活跃度
+    trending_min_score: float = 0.01  # 衰减后低于该值的帖子移出热门表
+    
+    # 写合并（group commit）配置：把并发的发帖/评论写入合并到一个事务提交
+    write_coalescing_enabled: bool = False
+    write_coalescing_window_ms: float = 5.0  # 收集一批写入的最长等待时间
+    write_coalescing_max_batch: int = 64  # 每批最多合并的写入数
+    
+    # 断点续传配置：分片先写入预分配的临时文件，完成时才校验并移入上传目录
+    upload_tmp_path: str = "upload_tmp"  # 不在静态文件目录下，未完成的文件不可访问
+    upload_chunk_size: int = 1024 * 1024  # 建议的分片大小
+    upload_max_chunk_size: int = 8 * 1024 * 1024  # 单个分片上限
+    upload_max_sessions_per_user: int = 5
+    upload_session_ttl: int = 24 * 3600  # 超过该秒数没有活动的会话会被清理
+    upload_session_gc_interval: int = 600
+    
+    # 批量创建用户配置
+    bulk_user_max: int = 200  # 单次请求最多创建的用户数：哈希在请求内同步计算，更大的批次用 bulk_create_users.py
+    password_hash_workers: int = 0  # 并行计算密码哈希的进程数，0 表示 CPU 核数减一（至少 1 个），留一个核处理请求
+    
+    # 帖子变更日志配置（增量同步）
+    post_changes_retention_days: int = 30  # 超过该天数的变更记录被清理，更早的游标需要全量同步
+    post_changes_compaction_interval: int = 3600  # 后台压缩和清理周期（秒）
+    
+    # 在线备份配置：数据库快照和上传文件副本都写到 backup_path 下
+    backup_path: str = "backups"
+    backup_keep: int = 7  # 保留的数据库快照数
+    backup_max_mb_per_sec: float = 0  # 复制上传文件的限速，0 表示不限
+    
+    # 冷热分离配置：超过该天数的帖子及其评论移入归档表
+    archive_after_days: int = 365
+    
     class Config:
         env_file = ".env"
 
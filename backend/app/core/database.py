@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -8,9 +8,31 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
 
+if engine.dialect.name == "sqlite" and settings.sqlite_wal:
+    @event.listens_for(engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        # WAL 模式下读写互不阻塞，在线备份期间 API 的写入不必等待；日志模式保存在数据库文件中
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def get_sqlite_path() -> str:
+    """从数据库URL中解析出SQLite文件路径（供迁移、备份等直接操作数据库文件的工具使用）"""
+    if not settings.database_url.startswith("sqlite"):
+        raise ValueError("当前数据库不是SQLite")
+    return settings.database_url.split(":///", 1)[1]
+
+def dialect_insert(db):
+    """返回当前数据库方言的 insert，用于 ON CONFLICT 原子累加"""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,70 @@
+import secrets
+import threading
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# UUIDv7（RFC 9562）：前 48 位是毫秒时间戳，按时间递增，新行总是追加在索引末尾
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+def uuid7() -> uuid.UUID:
+    """生成 UUIDv7；同一毫秒内用 12 位计数器保证本进程内单调递增"""
+    global _last_ms, _sequence
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _sequence = secrets.randbits(11)  # 随机起点，留出一半空间给同一毫秒内的计数
+        else:
+            _sequence += 1
+            if _sequence > 0xFFF:
+                # 计数器用完时借用下一毫秒
+                _last_ms += 1
+                _sequence = secrets.randbits(11)
+        ms, sequence = _last_ms, _sequence
+    value = (ms << 80) | (0x7 << 76) | (sequence << 64) | (0b10 << 62) | secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+def new_id() -> str:
+    return str(uuid7())
+
+def parse_id(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(value)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+class CompactId(TypeDecorator):
+    """UUID 主键/外键类型：SQLite 中存 16 字节二进制，PostgreSQL 中用原生 UUID
+
+    Python 和 API 中仍是标准的 36 字符字符串。格式不合法的 ID 绑定为 NULL，查询不到任何行，
+    路由照常返回 404。
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import UUID
+            return dialect.type_descriptor(UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        parsed = value if isinstance(value, uuid.UUID) else parse_id(value)
+        if parsed is None:
+            return None
+        return str(parsed) if dialect.name == "postgresql" else parsed.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return str(uuid.UUID(bytes=value))
+        return str(value)
@@ -0,0 +1,44 @@
+import base64
+import io
+import os
+
+from PIL import Image
+
+PLACEHOLDER_SIZE = 16  # 占位图最长边像素
+PLACEHOLDER_QUALITY = 40
+
+def make_placeholder(img: Image.Image) -> str:
+    """生成极小的低质量 JPEG 占位图（data URI，通常几百字节），客户端放大并模糊显示
+
+    会原地缩小 img；JPEG 借助 draft 在解码时直接按比例缩小，不解码全尺寸像素。
+    """
+    img.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def inspect_image(path: str) -> dict:
+    """校验图片并提取元数据；阻塞调用，应在线程池中执行
+
+    先用 verify() 检查文件完整性，verify 之后对象不能再用，需重新打开读取像素生成占位图。
+    不是有效图片时抛出异常。
+    """
+    with Image.open(path) as img:
+        img.verify()
+    with Image.open(path) as img:
+        width, height = img.size
+        image_format = (img.format or "").lower()
+        placeholder = make_placeholder(img)
+    return {
+        "width": width,
+        "height": height,
+        "format": image_format,
+        "size": os.path.getsize(path),
+        "placeholder": placeholder,
+    }
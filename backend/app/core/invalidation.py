@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, event as sa_event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+POST_CHANGED = "post"  # key 为帖子ID
+USER_CHANGED = "user"  # key 为用户ID
+
+Handler = Callable[[str], None]
+
+_PENDING = "invalidation_pending"  # Session.info 中待提交后广播的事件
+
+class LocalBus:
+    """进程内失效广播：只通知当前进程的订阅者，单进程部署时使用"""
+
+    backend_name = "local"
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._remote_handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, event: str, handler: Handler):
+        self._handlers[event].append(handler)
+
+    def subscribe_remote(self, event: str, handler: Handler):
+        self._remote_handlers[event].append(handler)
+
+    def publish(self, event: str, key: str):
+        self.published += 1
+        self._dispatch(event, key)
+
+    def stage(self, db: Session, event: str, key: str):
+        """在调用方的事务中登记事件，提交后才广播，回滚则丢弃"""
+        db.info.setdefault(_PENDING, []).append((event, key))
+
+    def deliver(self, event: str, key: str):
+        """广播已随调用方事务提交的事件"""
+        self.publish(event, key)
+
+    def _dispatch(self, event: str, key: str, remote: bool = False):
+        handlers = self._handlers.get(event, [])
+        if remote:
+            handlers = handlers + self._remote_handlers.get(event, [])
+        for handler in handlers:
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("处理失效事件 %s:%s 失败", event, key)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend_name,
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+        }
+
+# 跨进程通知表；不属于模型，由 SQLiteBus 按需创建。AUTOINCREMENT 保证清理后 ID 不被复用，轮询不会漏掉事件
+invalidation_events = Table(
+    "invalidation_events", MetaData(),
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("event", String(20), nullable=False),
+    Column("key", String(64), nullable=False),
+    Column("origin", String(64), nullable=False),
+    Column("created_at", Float, nullable=False),
+    sqlite_autoincrement=True
+)
+
+class SQLiteBus(LocalBus):
+    """基于数据库通知表的跨进程失效广播
+
+    发布时写入 invalidation_events 表，各进程的后台线程按间隔轮询新事件并通知本地订阅者。
+    事件行在调用方的事务中写入，与数据修改一起提交，不额外占用一次写锁和 fsync。
+    本进程发布的事件在提交后直接在本地分发，轮询时跳过。
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, engine, poll_interval: float, retention: int):
+        super().__init__()
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_id = 0
+        self._table_ready = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ensure_table(self, conn):
+        if self._table_ready:
+            return
+        invalidation_events.create(conn, checkfirst=True)
+        self._table_ready = True
+
+    def _insert(self, conn, event: str, key: str):
+        self._ensure_table(conn)
+        conn.execute(insert(invalidation_events).values(
+            event=event, key=key, origin=self.origin, created_at=time.time()
+        ))
+
+    def publish(self, event: str, key: str):
+        with self.engine.begin() as conn:
+            self._insert(conn, event, key)
+        super().publish(event, key)
+
+    def stage(self, db: Session, event: str, key: str):
+        self._insert(db.connection(), event, key)
+        super().stage(db, event, key)
+
+    def deliver(self, event: str, key: str):
+        LocalBus.publish(self, event, key)  # 事件行已随事务提交，只需本地分发
+
+    def start(self):
+        with self.engine.begin() as conn:
+            self._ensure_table(conn)
+            # 不回放启动前的历史事件
+            self._last_id = conn.execute(select(func.coalesce(func.max(invalidation_events.c.id), 0))).scalar()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="invalidation-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 5)
+
+    def _poll_loop(self):
+        last_prune = time.monotonic()
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+                if time.monotonic() - last_prune > self.retention:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except Exception:
+                logger.exception("轮询失效事件失败")
+
+    def poll(self):
+        """拉取并分发其他进程发布的新事件"""
+        table = invalidation_events
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.event, table.c.key, table.c.origin)
+                .where(table.c.id > self._last_id).order_by(table.c.id)
+            ).fetchall()
+        for event_id, event, key, origin in rows:
+            self._last_id = event_id
+            if origin != self.origin:
+                self.received += 1
+                self._dispatch(event, key, remote=True)
+
+    def prune(self):
+        """删除超过保留时间的事件"""
+        with self.engine.begin() as conn:
+            conn.execute(invalidation_events.delete().where(
+                invalidation_events.c.created_at < time.time() - self.retention
+            ))
+
+class RedisBus(LocalBus):
+    """基于 Redis 发布/订阅的跨进程失效广播（可选，需要安装 redis 包）"""
+
+    backend_name = "redis"
+    channel = "kenbunlog:invalidation"
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("使用 redis 失效广播后端需要安装 redis 包")
+        self.client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+
+    def publish(self, event: str, key: str):
+        message = json.dumps({"event": event, "key": key, "origin": self.origin})
+        self.client.publish(self.channel, message)
+        super().publish(event, key)
+
+    def start(self):
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop(self):
+        if self._thread:
+            self._thread.stop()
+        if self._pubsub:
+            self._pubsub.close()
+
+    def _on_message(self, message):
+        data = json.loads(message["data"])
+        if data["origin"] != self.origin:
+            self.received += 1
+            self._dispatch(data["event"], data["key"], remote=True)
+
+def create_bus() -> LocalBus:
+    """根据配置创建失效广播后端"""
+    backend = settings.invalidation_backend
+    if backend == "auto":
+        backend = "sqlite" if settings.workers > 1 else "local"
+
+    if backend == "local":
+        return LocalBus()
+    if backend == "sqlite":
+        from .database import engine
+        return SQLiteBus(engine, settings.invalidation_poll_interval, settings.invalidation_retention)
+    if backend == "redis":
+        return RedisBus(settings.invalidation_redis_url)
+    raise ValueError(f"未知的失效广播后端: {backend}")
+
+bus = create_bus()
+
+def publish(event: str, key: str, db: Optional[Session] = None):
+    """广播失效事件，失败只记录日志，不影响写操作
+
+    传入 db 时在提交之前调用：事件随该会话的事务一起提交，提交后才通知订阅者，回滚则不广播。
+    不传 db 时在提交之后调用，立即广播。
+    """
+    try:
+        if db is not None:
+            bus.stage(db, event, key)
+        else:
+            bus.publish(event, key)
+    except Exception:
+        logger.exception("广播失效事件 %s:%s 失败", event, key)
+
+def subscribe(event: str, handler: Handler):
+    """订阅失效事件，handler 接收事件的 key"""
+    bus.subscribe(event, handler)
+
+def subscribe_remote(event: str, handler: Handler):
+    """只订阅其他进程发布的失效事件，用于本进程的写入已直接处理过的场景"""
+    bus.subscribe_remote(event, handler)
+
+@sa_event.listens_for(Session, "after_commit")
+def _deliver_pending(db: Session):
+    for event, key in db.info.pop(_PENDING, []):
+        try:
+            bus.deliver(event, key)
+        except Exception:
+            logger.exception("广播失效事件 %s:%s 失败", event, key)
+
+@sa_event.listens_for(Session, "after_transaction_end")
+def _discard_pending(db: Session, transaction):
+    # 提交时已在 after_commit 中取出；回滚或未提交就关闭会话时丢弃
+    if transaction.parent is None:
+        db.info.pop(_PENDING, None)
@@ -0,0 +1,232 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+# 只处理 JPEG 和 PNG；GIF 可能是动图，重新编码容易变大或丢帧
+FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+
+ORIENTATION_TAG = 0x0112
+
+Quality = Union[int, str]  # 1-95，或 "keep" 沿用原图的量化表（近似无损）
+
+@dataclass
+class RecompressResult:
+    name: str
+    status: str  # replaced / kept / failed
+    old_size: int
+    new_size: int
+    webp_size: int = 0
+    width: int = 0
+    height: int = 0
+    mtime: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class RecompressReport:
+    files: int = 0
+    replaced: int = 0
+    kept: int = 0
+    failed: int = 0
+    skipped: int = 0  # 已处理过（断点续传）或刚上传的文件
+    bytes_before: int = 0
+    bytes_after: int = 0
+    webp_bytes: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def add(self, result: RecompressResult):
+        self.files += 1
+        self.bytes_before += result.old_size
+        self.bytes_after += result.new_size
+        self.webp_bytes += result.webp_size
+        if result.status == "replaced":
+            self.replaced += 1
+        elif result.status == "kept":
+            self.kept += 1
+        else:
+            self.failed += 1
+            self.errors[result.name] = result.error
+
+def _encode(img: Image.Image, fmt: str, path: str, quality: Quality, icc_profile: Optional[bytes]):
+    """不带 EXIF、文本块等元数据重新编码；保留 ICC 配置文件以免颜色偏差"""
+    options = {"optimize": True}
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    if fmt == "JPEG":
+        options["progressive"] = True
+        options["quality"] = quality
+        if quality == "keep":
+            options["subsampling"] = "keep"
+    img.save(path, format=fmt, **options)
+
+def recompress_file(
+    path: str,
+    quality: Quality = "keep",
+    webp: bool = False,
+    webp_quality: int = 80
+) -> RecompressResult:
+    """重新编码单个文件（在子进程中执行）
+
+    写入同目录下的临时文件，只有变小时才用 os.replace 原子替换原文件；
+    按 EXIF 方向旋转后再去掉 EXIF，显示效果不变。
+    """
+    name = os.path.basename(path)
+    old_size = os.path.getsize(path)
+    fmt = FORMATS[os.path.splitext(name)[1].lower()]
+    directory = os.path.dirname(path)
+    tmp_path = os.path.join(directory, f".{name}.recompress")
+    try:
+        with Image.open(path) as original:
+            original.load()
+            icc_profile = original.info.get("icc_profile")
+            img = original
+            if original.getexif().get(ORIENTATION_TAG, 1) != 1:
+                img = ImageOps.exif_transpose(original)
+                if quality == "keep":
+                    quality = 90  # 旋转后不再是原 JPEG 对象，无法沿用量化表
+            if fmt == "JPEG" and img.mode not in ("RGB", "L", "CMYK"):
+                img = img.convert("RGB")
+
+            _encode(img, fmt, tmp_path, quality, icc_profile)
+            new_size = os.path.getsize(tmp_path)
+
+            webp_size = 0
+            if webp:
+                webp_path = path + ".webp"
+                webp_tmp = os.path.join(directory, f".{name}.webp.recompress")
+                img.save(webp_tmp, format="WEBP", quality=webp_quality, method=6)
+                webp_size = os.path.getsize(webp_tmp)
+                if webp_size < min(old_size, new_size):
+                    os.replace(webp_tmp, webp_path)
+                else:
+                    os.remove(webp_tmp)
+                    webp_size = 0
+
+            width, height = img.size
+
+        if new_size < old_size:
+            os.replace(tmp_path, path)
+            return RecompressResult(
+                name, "replaced", old_size, new_size, webp_size, width, height, os.path.getmtime(path)
+            )
+        os.remove(tmp_path)
+        return RecompressResult(name, "kept", old_size, old_size, webp_size, mtime=os.path.getmtime(path))
+    except Exception as exc:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return RecompressResult(name, "failed", old_size, old_size, error=str(exc))
+
+def _lower_priority():
+    """降低子进程的 CPU（以及随之的磁盘 I/O）优先级，让出资源给 API"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+# 断点续传：每处理完一个文件追加一行状态，重新运行时跳过大小和修改时间都没变的文件
+
+def load_state(state_path: str) -> Dict[str, Tuple[int, float]]:
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # 中断时写了一半的行
+                state[entry["name"]] = (entry["size"], entry["mtime"])
+    return state
+
+def iter_images(upload_path: str) -> Iterator[os.DirEntry]:
+    """上传目录中可处理的图片，跳过隐藏文件（包括本工具的临时文件）"""
+    with os.scandir(upload_path) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            if os.path.splitext(entry.name)[1].lower() in FORMATS:
+                yield entry
+
+class RateLimiter:
+    """按输入字节数限速（令牌桶），避免后台任务占满磁盘带宽"""
+
+    def __init__(self, bytes_per_second: Optional[float]):
+        self.rate = bytes_per_second
+        self.allowance = 0.0
+        self.last = time.monotonic()
+
+    def acquire(self, amount: int):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.allowance = min(self.allowance + (now - self.last) * self.rate, self.rate)
+        self.last = now
+        self.allowance -= amount
+        if self.allowance < 0:
+            time.sleep(-self.allowance / self.rate)
+
+def recompress_uploads(
+    upload_path: str,
+    state_path: str,
+    workers: int = 2,
+    quality: Quality = "keep",
+    webp: bool = False,
+    webp_quality: int = 80,
+    max_bytes_per_second: Optional[float] = None,
+    min_age: float = 60,
+    on_result: Optional[Callable[[RecompressResult], None]] = None,
+    report: Callable[[str], None] = print
+) -> RecompressReport:
+    """用进程池批量重新压缩上传目录中的图片，返回汇总结果
+
+    同时在途的任务数限制为进程数的两倍，目录再大内存占用也不变；
+    on_result 在主进程中对每个结果调用（例如更新图片元数据）。
+    """
+    summary = RecompressReport()
+    limiter = RateLimiter(max_bytes_per_second)
+    start = time.monotonic()
+    state = load_state(state_path)
+
+    with open(state_path, "a", encoding="utf-8") as state_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_lower_priority) as executor:
+        pending = set()
+
+        def collect(done):
+            for future in done:
+                result = future.result()
+                summary.add(result)
+                if result.status != "failed":
+                    size = result.new_size if result.status == "replaced" else result.old_size
+                    state_file.write(json.dumps({"name": result.name, "size": size, "mtime": result.mtime}) + "\n")
+                    state_file.flush()
+                if on_result is not None:
+                    on_result(result)
+                if summary.files % 100 == 0:
+                    report(
+                        f"已处理 {summary.files} 个文件，节省 {summary.bytes_saved / 1024 / 1024:.1f} MB"
+                        f"（{summary.files / (time.monotonic() - start):.1f} 个/秒）"
+                    )
+
+        for entry in iter_images(upload_path):
+            stat = entry.stat()
+            # 跳过已处理过且未变化的文件，以及刚上传、可能还在写入的文件
+            if state.get(entry.name) == (stat.st_size, stat.st_mtime) or stat.st_mtime > time.time() - min_age:
+                summary.skipped += 1
+                continue
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            limiter.acquire(stat.st_size)
+            pending.add(executor.submit(recompress_file, entry.path, quality, webp, webp_quality))
+        collect(wait(pending).done)
+
+    summary.elapsed = time.monotonic() - start
+    return summary
@@ -1,5 +1,9 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
@@ -14,6 +18,45 @@ def get_password_hash(password: str) -> str:
     """生成密码哈希"""
     return pwd_context.hash(password)
 
+# 批量哈希：bcrypt 是 CPU 密集型计算，放到进程池中并行，不受 GIL 限制
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+def _hash_one(args) -> str:
+    password, rounds = args
+    context = pwd_context.using(bcrypt__rounds=rounds) if rounds else pwd_context
+    return context.hash(password)
+
+def hash_workers() -> int:
+    return settings.password_hash_workers or max((os.cpu_count() or 1) - 1, 1)
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    """首次使用时创建进程池；用 spawn 启动，避免 fork 继承服务进程的线程和数据库连接"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=hash_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+def hash_passwords(passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+    """并行生成一批密码哈希，结果与输入顺序一致；rounds 仅用于基准测试"""
+    items = [(password, rounds) for password in passwords]
+    workers = hash_workers()
+    if len(items) <= 1 or workers == 1:
+        return [_hash_one(item) for item in items]
+    chunksize = max(1, len(items) // (workers * 4))
+    return list(_get_hash_pool().map(_hash_one, items, chunksize=chunksize))
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(cancel_futures=True)
+            _hash_pool = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建JWT访问令牌"""
     to_encode = data.copy()
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from . import invalidation
+from .config import settings
+
+class SingleFlight:
+    """合并并发的相同读取（single-flight），可选极短的微缓存
+
+    同一个 key（路由和参数）同时只有一个任务真正执行查询和序列化，其余请求等待并共享结果，
+    包括异常。查询在独立的任务中执行，发起请求的客户端断开不会影响其他等待者。
+    执行成功的结果可以再缓存 ttl 秒。
+
+    写操作发布失效事件时删除对应 key 的缓存，并摘除正在执行的查询：之后到达的请求重新查询，
+    不会拿到写入之前的数据。失效事件可能在其他线程中分发，内部状态用锁保护。
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0, max_entries: int = 1000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # 失效代数：查询开始之后 key 被失效过，结果就不再缓存
+        self._generation = 0
+        self._invalidated_at: Dict[Hashable, int] = {}
+        self._floor = 0  # 清空 _invalidated_at 时的代数，不在表中的 key 按此时失效处理
+
+        # 计数器
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.invalidated = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            self.calls += 1
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self.cache_hits += 1
+                    return entry[1]
+                del self._cache[key]
+            task = self._inflight.get(key)
+            if task is None:
+                self.executions += 1
+                task = asyncio.get_running_loop().create_task(self._run(key, func, self._generation))
+                task.add_done_callback(_retrieve_exception)
+                self._inflight[key] = task
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, func: Callable[[], Awaitable[Any]], started: int) -> Any:
+        try:
+            value = await func()
+        except BaseException:
+            with self._lock:
+                self.errors += 1
+                self._finish(key)
+            raise
+        with self._lock:
+            self._finish(key)
+            if self.ttl > 0 and self._invalidated_at.get(key, self._floor) <= started:
+                self._cache[key] = (time.monotonic() + self.ttl, value)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return value
+
+    def _finish(self, key: Hashable):
+        task = self._inflight.get(key)
+        if task is not None and task is asyncio.current_task():
+            del self._inflight[key]
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self.invalidated += 1
+            self._generation += 1
+            self._invalidated_at[key] = self._generation
+            if len(self._invalidated_at) > self.max_entries * 10:
+                self._invalidated_at.clear()
+                self._floor = self._generation
+            self._cache.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.invalidated += 1
+            self._generation += 1
+            self._invalidated_at.clear()
+            self._floor = self._generation
+            self._cache.clear()
+            self._inflight.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "ttl": self.ttl,
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": self.shared,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "invalidated": self.invalidated,
+                "inflight": len(self._inflight),
+                "cached": len(self._cache),
+            }
+
+def _retrieve_exception(task: asyncio.Task):
+    # 所有等待者都已断开时，避免 "Task exception was never retrieved" 警告
+    if not task.cancelled():
+        task.exception()
+
+# 帖子详情：key 为帖子ID；帖子或其评论变化时失效，用户信息（作者、评论者）变化时整体清空
+post_detail_flight = SingleFlight(
+    "post_detail",
+    ttl=settings.post_detail_cache_ttl,
+    max_entries=settings.post_detail_cache_max_entries
+)
+invalidation.subscribe(invalidation.POST_CHANGED, post_detail_flight.invalidate)
+invalidation.subscribe(invalidation.USER_CHANGED, lambda user_id: post_detail_flight.clear())
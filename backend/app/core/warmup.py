@@ -0,0 +1,125 @@
+import logging
+import os
+import time
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+def _process_started_at() -> float:
+    """进程创建时间（Unix 时间戳），取自 /proc/self/stat，包含解释器启动和导入模块的耗时
+
+    无法读取时（非 Linux）退回到本模块的导入时间。
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # 第 2 个字段是可能带空格的进程名，从最后一个右括号之后开始数；第 22 个字段是开机后的时钟滴答数
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime "))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+# 进程启动时间点，用于计算冷启动耗时
+PROCESS_STARTED_AT = _process_started_at()
+
+warmup_state = {
+    "ready": False,
+    "warmup_seconds": None,
+    "cold_start_seconds": None,
+    "steps": {},
+}
+
+# 其他模块注册的额外预热步骤（如缓存填充）
+_extra_steps: List[Tuple[str, Callable[[], None]]] = []
+
+def register_warmup_step(name: str, step: Callable[[], None]):
+    """注册额外的预热步骤，在内置步骤之后执行"""
+    _extra_steps.append((name, step))
+
+def prefill_pool():
+    """同时检出连接池容量数量的连接，让连接池在第一个请求前就建好连接"""
+    from .database import engine
+
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = []
+    try:
+        for _ in range(pool_size):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+
+def build_models():
+    """完成 SQLAlchemy 映射配置和 Pydantic 模型构建，避免第一个请求承担这部分开销"""
+    from sqlalchemy.orm import configure_mappers
+    from pydantic import BaseModel
+    import app.models  # noqa: F401
+    import app.schemas as schemas
+
+    configure_mappers()
+    for name in schemas.__all__:
+        schema = getattr(schemas, name)
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            schema.model_rebuild()
+            schema.model_json_schema()
+
+def import_heavy_modules():
+    """导入并初始化重量级模块：PIL 插件注册、bcrypt 后端加载"""
+    from PIL import Image
+    from .security import pwd_context
+
+    Image.init()
+    pwd_context.hash("warmup")
+
+def warm_feed():
+    """执行一次首页帖子查询并序列化，预热查询编译缓存和数据库页缓存"""
+    from .database import SessionLocal
+    from app.crud import post as post_crud
+    from app.schemas.post import Post
+
+    db = SessionLocal()
+    try:
+        posts = post_crud.get_posts(db, skip=0, limit=20)
+        [Post.model_validate(post).model_dump(mode="json") for post in posts]
+    finally:
+        db.close()
+
+def get_warmup_steps() -> List[Tuple[str, Callable[[], None]]]:
+    steps = [
+        ("prefill_pool", prefill_pool),
+        ("build_models", build_models),
+        ("import_heavy_modules", import_heavy_modules),
+    ]
+    if settings.warmup_feed:
+        steps.append(("warm_feed", warm_feed))
+    return steps + _extra_steps
+
+def run_warmup():
+    """依次执行预热步骤并记录耗时，完成后将进程标记为就绪
+
+    单个步骤失败只记录日志，不阻止进程就绪。
+    """
+    start = time.monotonic()
+    if settings.warmup_enabled:
+        for name, step in get_warmup_steps():
+            step_start = time.monotonic()
+            try:
+                step()
+            except Exception:
+                logger.exception("预热步骤 %s 失败", name)
+            warmup_state["steps"][name] = round(time.monotonic() - step_start, 4)
+
+    warmup_state["warmup_seconds"] = round(time.monotonic() - start, 4)
+    warmup_state["cold_start_seconds"] = round(time.time() - PROCESS_STARTED_AT, 4)
+    warmup_state["ready"] = True
+    logger.info(
+        "预热完成：预热 %.3fs，冷启动 %.3fs",
+        warmup_state["warmup_seconds"], warmup_state["cold_start_seconds"]
+    )
\ No newline at end of file
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class WriteRequest:
+    def __init__(self, apply: Callable[[Session], Any], finish: Optional[Callable[[Session, Any], None]]):
+        self.apply = apply
+        self.finish = finish
+        self.future: Future = Future()
+        self.result = None
+
+class WriteCoalescer:
+    """写合并器（group commit）
+
+    后台写线程在一个短时间窗口内收集并发请求的写入，在同一个事务中执行并只提交一次，
+    SQLite 下多个请求共享一次 fsync 和一次写锁。每个请求在事务提交后才拿到自己的结果，
+    持久性与单独提交相同；某个写入出错时回滚整批并去掉出错的写入重试，其余请求不受影响。
+
+    apply(db) 在事务中执行写入（不提交），返回值作为结果；失效事件也应在这里传入 db 发布，
+    与整批写入一起提交，不要在写线程中为每个写入单独开事务；
+    finish(db, result) 在提交后执行，用于刷新对象和推送事件。
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[WriteRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 计数器
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.retries = 0
+        self.max_batch_seen = 0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-coalescer", daemon=True)
+                self._thread.start()
+
+    async def submit(self, apply: Callable[[Session], Any], finish: Optional[Callable[[Session, Any], None]] = None):
+        """提交一个写入，等待所在批次提交后返回结果或抛出该写入自身的异常"""
+        self._ensure_started()
+        request = WriteRequest(apply, finish)
+        self._queue.put(request)
+        return await asyncio.wrap_future(request.future)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._process(batch)
+
+    def _process(self, batch: List[WriteRequest]):
+        self.batches += 1
+        self.writes += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+        pending = batch
+        while pending:
+            db = SessionLocal()
+            try:
+                failed = self._apply_all(db, pending)
+                if failed is not None:
+                    # 回滚整批，去掉出错的写入后重试其余写入
+                    db.rollback()
+                    pending = [request for request in pending if request is not failed]
+                    self.retries += 1
+                    continue
+
+                try:
+                    db.commit()
+                except Exception as exc:
+                    db.rollback()
+                    for request in pending:
+                        self._fail(request, exc)
+                    return
+
+                for request in pending:
+                    try:
+                        if request.finish is not None:
+                            request.finish(db, request.result)
+                        request.future.set_result(request.result)
+                    except Exception as exc:
+                        # 已提交，只是提交后的处理失败
+                        logger.exception("写合并提交后处理失败")
+                        request.future.set_exception(exc)
+                return
+            finally:
+                db.close()
+
+    def _apply_all(self, db: Session, requests: List[WriteRequest]) -> Optional[WriteRequest]:
+        """依次执行写入，返回第一个出错的写入（已设置异常），全部成功返回 None"""
+        for request in requests:
+            try:
+                request.result = request.apply(db)
+                db.flush()
+            except Exception as exc:
+                self._fail(request, exc)
+                return request
+        return None
+
+    def _fail(self, request: WriteRequest, exc: Exception):
+        self.failed += 1
+        if not request.future.done():
+            request.future.set_exception(exc)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.write_coalescing_enabled,
+            "batches": self.batches,
+            "writes": self.writes,
+            "failed": self.failed,
+            "retries": self.retries,
+            "max_batch": self.max_batch_seen,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0,
+            "queue_depth": self._queue.qsize(),
+        }
+
+write_coalescer = WriteCoalescer(settings.write_coalescing_window_ms, settings.write_coalescing_max_batch)
\ No newline at end of file
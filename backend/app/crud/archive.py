@@ -0,0 +1,108 @@
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.archive import ArchivedPost, ArchivedComment
+from app.models.trending import PostScore
+from app.crud import change
+
+POST_COLUMNS = [column.name for column in Post.__table__.columns]
+COMMENT_COLUMNS = [column.name for column in Comment.__table__.columns]
+
+# 读取：归档内容只读，按ID和作者读取时使用
+
+def get_archived_post(db: Session, post_id: str) -> Optional[ArchivedPost]:
+    """获取已归档的可见帖子"""
+    return db.query(ArchivedPost).options(joinedload(ArchivedPost.author)).filter(
+        ArchivedPost.id == post_id,
+        ArchivedPost.is_hidden == False
+    ).first()
+
+def get_archived_post_with_comments(db: Session, post_id: str) -> Optional[ArchivedPost]:
+    """获取已归档的帖子及其评论"""
+    return db.query(ArchivedPost).options(
+        joinedload(ArchivedPost.author),
+        joinedload(ArchivedPost.comments).joinedload(ArchivedComment.author)
+    ).filter(ArchivedPost.id == post_id, ArchivedPost.is_hidden == False).first()
+
+def get_archived_posts_by_ids(db: Session, post_ids: List[str]) -> List[ArchivedPost]:
+    if not post_ids:
+        return []
+    return db.query(ArchivedPost).options(joinedload(ArchivedPost.author)).filter(
+        ArchivedPost.id.in_(post_ids),
+        ArchivedPost.is_hidden == False
+    ).all()
+
+def get_archived_post_comments(db: Session, post_id: str) -> List[ArchivedComment]:
+    return db.query(ArchivedComment).options(joinedload(ArchivedComment.author)).filter(
+        ArchivedComment.post_id == post_id,
+        ArchivedComment.is_hidden == False
+    ).order_by(ArchivedComment.created_at.asc()).all()
+
+def _created_key(item):
+    return (item.created_at or datetime.min, item.id)
+
+def paginate_hot_and_archive(hot_query, archive_query, skip: int, limit: int) -> list:
+    """合并热表和归档表，按 (created_at, id) 倒序分页
+
+    归档按帖子整体移动，老帖子下的新评论也会进入归档表，两表的时间范围互相交叉，
+    所以各取前 skip + limit 条再归并。两个查询都必须按 created_at、id 倒序排列。
+    """
+    window = skip + limit
+    hot_items = hot_query.limit(window).all()
+    archive_items = archive_query.limit(window).all()
+    merged = heapq.merge(hot_items, archive_items, key=_created_key, reverse=True)
+    return list(itertools.islice(merged, skip, window))
+
+# 归档任务
+
+def archive_batch(db: Session, before: datetime, batch_size: int) -> int:
+    """把一批早于 before 的帖子及其全部评论移到归档表，返回本批帖子数"""
+    post_ids = [
+        row[0] for row in db.query(Post.id).filter(Post.created_at < before)
+        .order_by(Post.created_at.asc()).limit(batch_size)
+    ]
+    if not post_ids:
+        return 0
+
+    db.execute(insert(ArchivedPost).from_select(
+        POST_COLUMNS,
+        select(*[Post.__table__.c[name] for name in POST_COLUMNS]).where(Post.id.in_(post_ids))
+    ))
+    db.execute(insert(ArchivedComment).from_select(
+        COMMENT_COLUMNS,
+        select(*[Comment.__table__.c[name] for name in COMMENT_COLUMNS]).where(Comment.post_id.in_(post_ids))
+    ))
+    db.query(Comment).filter(Comment.post_id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(PostScore).filter(PostScore.post_id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(Post).filter(Post.id.in_(post_ids)).delete(synchronize_session=False)
+    change.record_changes(db, post_ids, change.ARCHIVED)  # 增量同步的客户端据此知道帖子离开了热表
+    db.commit()
+    return len(post_ids)
+
+def archive_old_posts(
+    db: Session,
+    before: datetime,
+    batch_size: int = 200,
+    sleep: float = 0.05,
+    report: Callable[[str], None] = print
+) -> int:
+    """分批归档，每批一个短事务，批次之间让出数据库；可随时中断，再次运行会继续"""
+    total = 0
+    start = time.monotonic()
+    while True:
+        archived = archive_batch(db, before, batch_size)
+        if not archived:
+            break
+        total += archived
+        report(f"已归档 {total} 个帖子（{total / (time.monotonic() - start):.0f} 个/秒）")
+        if sleep:
+            time.sleep(sleep)
+    return total
\ No newline at end of file
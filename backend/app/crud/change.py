@@ -0,0 +1,134 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.archive import ArchivedPost
+from app.models.change import PostChange, PostChangeState
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+HIDDEN = "hidden"
+DELETED = "deleted"
+ARCHIVED = "archived"  # 移入归档表，内容仍可按ID读取
+
+# 写入：在调用方的事务中追加，随帖子的修改一起提交或回滚
+
+def record_change(db: Session, post_id: str, op: str):
+    db.add(PostChange(post_id=post_id, op=op))
+
+def record_changes(db: Session, post_ids: List[str], op: str):
+    db.add_all(PostChange(post_id=post_id, op=op) for post_id in post_ids)
+
+# 读取
+
+def get_horizon(db: Session) -> int:
+    return db.query(PostChangeState.horizon).filter(PostChangeState.id == 1).scalar() or 0
+
+def get_latest_cursor(db: Session) -> int:
+    return max(db.query(func.max(PostChange.seq)).scalar() or 0, get_horizon(db))
+
+def is_cursor_expired(db: Session, since: int) -> bool:
+    """游标之后的记录已有部分按保留期清理"""
+    return since < get_horizon(db)
+
+def get_changes(db: Session, since: int, limit: int = 100) -> Tuple[List[dict], int, bool]:
+    """读取 since 之后的一页变更，返回 (变更, 下一页游标, 是否还有更多)
+
+    同一页中同一个帖子只返回最后一条；post 为帖子当前的可见状态（已归档的帖子从归档表读取），
+    已隐藏或删除时为 None。
+    SQLite 的写事务串行执行，序号的分配顺序就是提交顺序，按序号翻页不会漏掉并发写入。
+    """
+    rows = db.query(PostChange).filter(PostChange.seq > since).order_by(PostChange.seq.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1].seq if rows else since
+
+    latest = {}
+    for row in rows:
+        latest.pop(row.post_id, None)  # 重新插入，按最后一次变更的顺序排列
+        latest[row.post_id] = row
+    posts = {
+        db_post.id: db_post
+        for db_post in db.query(Post).options(joinedload(Post.author)).filter(
+            Post.id.in_(list(latest)),
+            Post.is_hidden == False
+        )
+    } if latest else {}
+    missing = [post_id for post_id in latest if post_id not in posts]
+    if missing:
+        posts.update(
+            (db_post.id, db_post)
+            for db_post in db.query(ArchivedPost).options(joinedload(ArchivedPost.author)).filter(
+                ArchivedPost.id.in_(missing),
+                ArchivedPost.is_hidden == False
+            )
+        )
+
+    changes = [
+        {"seq": row.seq, "post_id": post_id, "op": row.op, "post": posts.get(post_id)}
+        for post_id, row in latest.items()
+    ]
+    return changes, cursor, has_more
+
+# 压缩与保留期
+
+def _delete_seqs(db: Session, seqs: List[int]):
+    db.query(PostChange).filter(PostChange.seq.in_(seqs)).delete(synchronize_session=False)
+
+def compact_superseded(db: Session, batch_size: int = 1000) -> int:
+    """删除已被同一帖子更新的记录覆盖的旧记录
+
+    每个帖子的最后一条记录始终保留，任何游标之后有变化的帖子仍能被读到，所以不影响已有游标。
+    """
+    newer = aliased(PostChange)
+    total = 0
+    while True:
+        seqs = [row[0] for row in db.execute(
+            select(PostChange.seq).where(
+                exists().where(newer.post_id == PostChange.post_id, newer.seq > PostChange.seq)
+            ).limit(batch_size)
+        )]
+        if not seqs:
+            return total
+        _delete_seqs(db, seqs)
+        db.commit()
+        total += len(seqs)
+
+def expire_old_changes(db: Session, before: datetime, batch_size: int = 1000) -> int:
+    """删除早于 before 的记录（包括墓碑）并推进保留边界，落在边界之前的游标随之失效"""
+    total = 0
+    while True:
+        seqs = [row[0] for row in db.query(PostChange.seq).filter(
+            PostChange.created_at < before
+        ).order_by(PostChange.seq.asc()).limit(batch_size)]
+        if not seqs:
+            return total
+        state = db.get(PostChangeState, 1)
+        if state is None:
+            state = PostChangeState(id=1, horizon=0)
+            db.add(state)
+        state.horizon = max(state.horizon, seqs[-1])
+        _delete_seqs(db, seqs)
+        db.commit()
+        total += len(seqs)
+
+def compact_post_changes() -> Tuple[int, int]:
+    """后台任务入口，返回 (压缩的记录数, 过期的记录数)"""
+    db = SessionLocal()
+    try:
+        superseded = compact_superseded(db)
+        before = datetime.now(timezone.utc) - timedelta(days=settings.post_changes_retention_days)
+        expired = expire_old_changes(db, before)
+    finally:
+        db.close()
+    if superseded or expired:
+        logger.info("帖子变更日志：压缩 %d 条，过期清理 %d 条", superseded, expired)
+    return superseded, expired
@@ -1,8 +1,23 @@
 from sqlalchemy.orm import Session, joinedload
 from app.models.comment import Comment
-from app.schemas.comment import CommentCreate, CommentUpdate
+from app.schemas.comment import Comment as CommentSchema, CommentCreate, CommentUpdate
+from app.core import invalidation
+from app.core.config import settings
+from app.crud import trending, stats, archive
+from app.core.comment_broker import comment_broker
+from app.core.write_coalescer import write_coalescer
 from typing import Optional, List
 
+def _push_comment_event(post_id: str, event_type: str, comment_id: str, db_comment: Optional[Comment] = None):
+    """向订阅该帖子的推送连接发布评论事件，隐藏和删除事件只带评论ID"""
+    if not comment_broker.is_watched(post_id):
+        return
+    if db_comment is not None:
+        data = CommentSchema.model_validate(db_comment).model_dump(mode="json")
+    else:
+        data = {"id": comment_id}
+    comment_broker.publish(post_id, event_type, data)
+
 def get_comment(db: Session, comment_id: str) -> Optional[Comment]:
     """获取单个评论"""
     return db.query(Comment).options(joinedload(Comment.author)).filter(
@@ -17,18 +32,40 @@ def get_post_comments(db: Session, post_id: str) -> List[Comment]:
         Comment.is_hidden == False
     ).order_by(Comment.created_at.asc()).all()
 
-def create_comment(db: Session, comment: CommentCreate, post_id: str, author_id: str) -> Comment:
-    """创建评论"""
+def _add_comment(db: Session, comment: CommentCreate, post_id: str, author_id: str) -> Comment:
+    """写入评论及相关汇总（不提交）"""
     db_comment = Comment(
         **comment.dict(),
         post_id=post_id,
         author_id=author_id
     )
     db.add(db_comment)
-    db.commit()
+    trending.add_activity(db, post_id, settings.trending_comment_weight)
+    stats.record_comment_created(db)
+    # 失效事件随写入所在的事务提交：写合并时整批只有一次提交
+    invalidation.publish(invalidation.POST_CHANGED, post_id, db=db)
+    return db_comment
+
+def _comment_created(db: Session, db_comment: Comment):
+    """评论提交后的处理：刷新对象（含作者）并推送评论事件"""
     db.refresh(db_comment)
+    db_comment.author  # 预先加载作者，写合并时会话关闭后对象仍可序列化
+    _push_comment_event(db_comment.post_id, "created", db_comment.id, db_comment)
+
+def create_comment(db: Session, comment: CommentCreate, post_id: str, author_id: str) -> Comment:
+    """创建评论"""
+    db_comment = _add_comment(db, comment, post_id, author_id)
+    db.commit()
+    _comment_created(db, db_comment)
     return db_comment
 
+async def create_comment_coalesced(comment: CommentCreate, post_id: str, author_id: str) -> Comment:
+    """通过写合并器创建评论，与其他并发写入在同一个事务中提交"""
+    return await write_coalescer.submit(
+        lambda db: _add_comment(db, comment, post_id, author_id),
+        _comment_created
+    )
+
 def update_comment(db: Session, comment_id: str, comment_update: CommentUpdate) -> Optional[Comment]:
     """更新评论"""
     db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
@@ -36,25 +73,38 @@ def update_comment(db: Session, comment_id: str, comment_update: CommentUpdate)
         update_data = comment_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_comment, field, value)
+        invalidation.publish(invalidation.POST_CHANGED, db_comment.post_id, db=db)
         db.commit()
         db.refresh(db_comment)
+        _push_comment_event(db_comment.post_id, "updated", comment_id, db_comment)
     return db_comment
 
 def delete_comment(db: Session, comment_id: str) -> bool:
     """删除评论"""
     db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
     if db_comment:
+        post_id = db_comment.post_id
+        if not db_comment.is_hidden:
+            trending.remove_comment_activity(db, db_comment)
+        stats.record_comment_deleted(db, db_comment)
         db.delete(db_comment)
+        invalidation.publish(invalidation.POST_CHANGED, post_id, db=db)
         db.commit()
+        _push_comment_event(post_id, "deleted", comment_id)
         return True
     return False
 
 def get_user_comments(db: Session, user_id: str, skip: int = 0, limit: int = 20) -> List[Comment]:
-    """获取用户的评论"""
-    return db.query(Comment).options(joinedload(Comment.author)).filter(
+    """获取用户的评论（热表和已归档的评论按创建时间合并）"""
+    hot_query = db.query(Comment).options(joinedload(Comment.author)).filter(
         Comment.author_id == user_id,
         Comment.is_hidden == False
-    ).order_by(Comment.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(Comment.created_at.desc(), Comment.id.desc())
+    archive_query = db.query(archive.ArchivedComment).options(joinedload(archive.ArchivedComment.author)).filter(
+        archive.ArchivedComment.author_id == user_id,
+        archive.ArchivedComment.is_hidden == False
+    ).order_by(archive.ArchivedComment.created_at.desc(), archive.ArchivedComment.id.desc())
+    return archive.paginate_hot_and_archive(hot_query, archive_query, skip, limit)
 
 # 管理员功能
 def get_all_comments(db: Session, skip: int = 0, limit: int = 20) -> List[Comment]:
@@ -67,7 +117,12 @@ def hide_comment(db: Session, comment_id: str) -> Optional[Comment]:
     """隐藏评论"""
     db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
     if db_comment:
+        if not db_comment.is_hidden:
+            trending.remove_comment_activity(db, db_comment)
+            stats.record_comment_hidden(db)
         db_comment.is_hidden = True
+        invalidation.publish(invalidation.POST_CHANGED, db_comment.post_id, db=db)
         db.commit()
         db.refresh(db_comment)
+        _push_comment_event(db_comment.post_id, "hidden", comment_id)
     return db_comment
\ No newline at end of file
@@ -0,0 +1,142 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import String, and_, or_, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+
+# 表名 -> (模型, 状态筛选列, 导出列)；用户不导出密码哈希
+EXPORTS = {
+    "posts": (Post, Post.is_hidden, [
+        "id", "title", "content", "image_urls", "author_id", "is_hidden", "created_at", "updated_at"
+    ]),
+    "comments": (Comment, Comment.is_hidden, [
+        "id", "content", "post_id", "author_id", "is_hidden", "created_at", "updated_at"
+    ]),
+    "users": (User, User.is_blocked, [
+        "id", "username", "email", "role", "is_blocked", "created_at"
+    ]),
+}
+
+FORMATS = ("ndjson", "csv")
+
+PAGE_SIZE = 1000
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite 中的创建时间是不带时区的 UTC 字符串，带时区的参数先换算成 UTC 再去掉时区"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def iter_rows(
+    db: Session,
+    table: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    hidden: Optional[bool] = None,
+    page_size: int = PAGE_SIZE
+) -> Iterator[dict]:
+    """按 (created_at, id) 键集分页逐页读取，内存占用与表大小无关
+
+    每页在一个短读事务中取完，页与页之间不持有锁：回滚日志模式下长时间的读会一直持有共享锁，
+    导出传给慢客户端期间 API 的写入都会等待超时。
+    hidden 对帖子和评论按隐藏状态筛选，对用户按屏蔽状态筛选。
+    """
+    model, status_column, columns = EXPORTS[table]
+    # 游标使用库中存储的原始值：SQLite 中秒级的默认时间与绑定参数的格式（带微秒）不同，按 datetime 比较会漏行
+    created_key = type_coerce(model.created_at, String)
+    stmt = select(*[getattr(model, column) for column in columns], created_key.label("_created_key"), model.id.label("_id_key"))
+    since, until = _to_naive_utc(since), _to_naive_utc(until)
+    if since is not None:
+        stmt = stmt.where(model.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(model.created_at < until)
+    if hidden is not None:
+        stmt = stmt.where(status_column == hidden)
+    stmt = stmt.order_by(model.created_at, model.id).limit(page_size)
+
+    last = None
+    while True:
+        page_stmt = stmt
+        if last is not None:
+            page_stmt = stmt.where(or_(
+                created_key > last[0],
+                and_(created_key == last[0], model.id > last[1])
+            ))
+        rows = db.execute(page_stmt).mappings().all()
+        db.rollback()  # 结束读事务，释放共享锁
+        for row in rows:
+            yield {column: row[column] for column in columns}
+        if len(rows) < page_size:
+            return
+        last = (rows[-1]["_created_key"], rows[-1]["_id_key"])
+
+def _to_json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _to_csv_value(value):
+    value = _to_json_value(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def _iter_encoded(rows: Iterator[dict], fmt: str, columns) -> Iterator[bytes]:
+    if fmt == "ndjson":
+        for row in rows:
+            data = {key: _to_json_value(value) for key, value in row.items()}
+            yield (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_to_csv_value(row[column]) for column in columns])
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+def _iter_gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 生成 gzip 格式
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def iter_export(
+    table: str,
+    fmt: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    hidden: Optional[bool] = None,
+    compress: bool = True
+) -> Iterator[bytes]:
+    """生成导出文件的字节流（可选边生成边 gzip 压缩），自行管理数据库会话"""
+    db = SessionLocal()
+    try:
+        columns = EXPORTS[table][2]
+        chunks = _iter_encoded(iter_rows(db, table, since, until, hidden), fmt, columns)
+        if compress:
+            chunks = _iter_gzip(chunks)
+        yield from chunks
+    finally:
+        db.close()
+
+def export_filename(table: str, fmt: str, compress: bool) -> str:
+    return f"{table}.{fmt}" + (".gz" if compress else "")
\ No newline at end of file
@@ -0,0 +1,29 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.image import ImageMeta
+
+def save_image_metadata(db: Session, images: Dict[str, dict], uploader_id: Optional[str] = None) -> List[ImageMeta]:
+    """保存一次上传的全部图片元数据（URL -> 元数据），一次提交"""
+    db_images = [ImageMeta(url=url, uploader_id=uploader_id, **meta) for url, meta in images.items()]
+    db.add_all(db_images)
+    db.commit()
+    return db_images
+
+def get_image_metadata(db: Session, urls: Iterable[str]) -> Dict[str, ImageMeta]:
+    """按 URL 批量获取图片元数据（一次 IN 查询）"""
+    urls = list(set(urls))
+    if not urls:
+        return {}
+    return {image.url: image for image in db.query(ImageMeta).filter(ImageMeta.url.in_(urls))}
+
+def attach_image_metadata(db: Session, posts: List) -> List:
+    """给帖子附加 images 属性（按 image_urls 的顺序），整页帖子只查询一次
+
+    没有元数据的图片（例如该功能上线前上传的）只返回 URL。
+    """
+    metadata = get_image_metadata(db, (url for post in posts for url in (post.image_urls or [])))
+    for post in posts:
+        post.images = [metadata.get(url) or {"url": url} for url in (post.image_urls or [])]
+    return posts
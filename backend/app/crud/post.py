@@ -1,23 +1,55 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app.models.post import Post
 from app.models.comment import Comment
 from app.models.user import User
 from app.schemas.post import PostCreate, PostUpdate
-from typing import Optional, List
+from app.core import invalidation
+from app.core.config import settings
+from app.crud import trending, stats, archive, change
+from app.core.write_coalescer import write_coalescer
+from typing import Optional, List, Dict
 
 def get_post(db: Session, post_id: str) -> Optional[Post]:
     """获取单个帖子"""
     return db.query(Post).options(joinedload(Post.author)).filter(Post.id == post_id, Post.is_hidden == False).first()
 
 def get_post_with_comments(db: Session, post_id: str) -> Optional[Post]:
-    """获取帖子及其评论"""
-    return db.query(Post).options(
+    """获取帖子及其评论（热表中没有时回退到归档表）"""
+    db_post = db.query(Post).options(
         joinedload(Post.author),
         joinedload(Post.comments).joinedload(Comment.author)
     ).filter(Post.id == post_id, Post.is_hidden == False).first()
+    if db_post is None:
+        return archive.get_archived_post_with_comments(db, post_id)
+    return db_post
+
+def get_posts_by_ids(db: Session, post_ids: List[str]) -> List[Post]:
+    """按ID批量获取可见帖子：一次 IN 查询取帖子，一次 IN 查询取作者，热表中缺少的再查归档表"""
+    if not post_ids:
+        return []
+    posts = db.query(Post).options(selectinload(Post.author)).filter(
+        Post.id.in_(post_ids),
+        Post.is_hidden == False
+    ).all()
+    found = {db_post.id for db_post in posts}
+    return posts + archive.get_archived_posts_by_ids(db, [post_id for post_id in post_ids if post_id not in found])
+
+def get_comment_counts(db: Session, post_ids: List[str]) -> Dict[str, int]:
+    """批量统计帖子的可见评论数"""
+    if not post_ids:
+        return {}
+    rows = db.query(Comment.post_id, func.count(Comment.id)).filter(
+        Comment.post_id.in_(post_ids),
+        Comment.is_hidden == False
+    ).group_by(Comment.post_id).all()
+    return dict(rows)
 
-def get_posts(db: Session, skip: int = 0, limit: int = 20, search: Optional[str] = None) -> List[Post]:
+def get_posts(db: Session, skip: int = 0, limit: int = 20, search: Optional[str] = None, sort: str = "latest") -> List[Post]:
     """获取帖子列表"""
+    if sort == "trending" and not search:
+        return trending.get_trending_posts(db, skip=skip, limit=limit)
+    
     query = db.query(Post).options(joinedload(Post.author)).filter(Post.is_hidden == False)
     
     if search:
@@ -30,14 +62,37 @@ def get_posts(db: Session, skip: int = 0, limit: int = 20, search: Optional[str]
     
     return query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
 
-def create_post(db: Session, post: PostCreate, author_id: str) -> Post:
-    """创建帖子"""
+def _add_post(db: Session, post: PostCreate, author_id: str) -> Post:
+    """写入帖子及相关汇总（不提交）"""
     db_post = Post(**post.dict(), author_id=author_id)
     db.add(db_post)
-    db.commit()
+    db.flush()
+    trending.add_activity(db, db_post.id, settings.trending_post_weight)
+    stats.record_post_created(db)
+    change.record_change(db, db_post.id, change.CREATED)
+    # 失效事件随写入所在的事务提交：写合并时整批只有一次提交
+    invalidation.publish(invalidation.POST_CHANGED, db_post.id, db=db)
+    return db_post
+
+def _post_created(db: Session, db_post: Post):
+    """帖子提交后的处理：刷新对象（含作者）"""
     db.refresh(db_post)
+    db_post.author  # 预先加载作者，写合并时会话关闭后对象仍可序列化
+
+def create_post(db: Session, post: PostCreate, author_id: str) -> Post:
+    """创建帖子"""
+    db_post = _add_post(db, post, author_id)
+    db.commit()
+    _post_created(db, db_post)
     return db_post
 
+async def create_post_coalesced(post: PostCreate, author_id: str) -> Post:
+    """通过写合并器创建帖子，与其他并发写入在同一个事务中提交"""
+    return await write_coalescer.submit(
+        lambda db: _add_post(db, post, author_id),
+        _post_created
+    )
+
 def update_post(db: Session, post_id: str, post_update: PostUpdate) -> Optional[Post]:
     """更新帖子"""
     db_post = db.query(Post).filter(Post.id == post_id).first()
@@ -45,6 +100,8 @@ def update_post(db: Session, post_id: str, post_update: PostUpdate) -> Optional[
         update_data = post_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_post, field, value)
+        change.record_change(db, post_id, change.UPDATED)
+        invalidation.publish(invalidation.POST_CHANGED, post_id, db=db)
         db.commit()
         db.refresh(db_post)
     return db_post
@@ -53,17 +110,28 @@ def delete_post(db: Session, post_id: str) -> bool:
     """删除帖子"""
     db_post = db.query(Post).filter(Post.id == post_id).first()
     if db_post:
+        trending.remove_post(db, post_id)
+        stats.record_post_deleted(db, db_post)
+        change.record_change(db, post_id, change.DELETED)
+        # 先批量删除评论，级联时不再逐条加载和删除
+        db.query(Comment).filter(Comment.post_id == post_id).delete(synchronize_session=False)
         db.delete(db_post)
+        invalidation.publish(invalidation.POST_CHANGED, post_id, db=db)
         db.commit()
         return True
     return False
 
 def get_user_posts(db: Session, user_id: str, skip: int = 0, limit: int = 20) -> List[Post]:
-    """获取用户的帖子"""
-    return db.query(Post).options(joinedload(Post.author)).filter(
+    """获取用户的帖子（热表和已归档的帖子按创建时间合并）"""
+    hot_query = db.query(Post).options(joinedload(Post.author)).filter(
         Post.author_id == user_id,
         Post.is_hidden == False
-    ).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(Post.created_at.desc(), Post.id.desc())
+    archive_query = db.query(archive.ArchivedPost).options(joinedload(archive.ArchivedPost.author)).filter(
+        archive.ArchivedPost.author_id == user_id,
+        archive.ArchivedPost.is_hidden == False
+    ).order_by(archive.ArchivedPost.created_at.desc(), archive.ArchivedPost.id.desc())
+    return archive.paginate_hot_and_archive(hot_query, archive_query, skip, limit)
 
 # 管理员功能
 def get_all_posts(db: Session, skip: int = 0, limit: int = 20) -> List[Post]:
@@ -74,7 +142,12 @@ def hide_post(db: Session, post_id: str) -> Optional[Post]:
     """隐藏帖子"""
     db_post = db.query(Post).filter(Post.id == post_id).first()
     if db_post:
+        if not db_post.is_hidden:
+            stats.record_post_hidden(db)
+            change.record_change(db, post_id, change.HIDDEN)
         db_post.is_hidden = True
+        trending.remove_post(db, post_id)
+        invalidation.publish(invalidation.POST_CHANGED, post_id, db=db)
         db.commit()
         db.refresh(db_post)
     return db_post
\ No newline at end of file
@@ -0,0 +1,176 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.stats import StatCounter, DailyStats
+from app.models.archive import ArchivedPost, ArchivedComment
+
+COUNTER_NAMES = ("users", "blocked_users", "posts", "hidden_posts", "comments", "hidden_comments")
+
+# 以下 record_* 函数只修改汇总表，不提交，随调用方的写操作在同一事务中提交
+
+def _bump_counter(db: Session, name: str, delta: int):
+    insert = dialect_insert(db)
+    stmt = insert(StatCounter).values(name=name, value=delta)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[StatCounter.name],
+        set_={"value": StatCounter.value + delta}
+    ))
+
+def _bump_daily(db: Session, day: date, field: str, delta: int):
+    insert = dialect_insert(db)
+    values = {"day": day, "signups": 0, "posts": 0, "comments": 0}
+    values[field] = delta
+    stmt = insert(DailyStats).values(**values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={field: getattr(DailyStats, field) + delta}
+    ))
+
+def _day_of(created_at: Optional[datetime]) -> date:
+    # 数据库中的创建时间为 UTC
+    return created_at.date() if created_at else datetime.utcnow().date()
+
+def record_user_created(db: Session, count: int = 1):
+    _bump_counter(db, "users", count)
+    _bump_daily(db, _day_of(None), "signups", count)
+
+def record_user_block_changed(db: Session, is_blocked: bool):
+    _bump_counter(db, "blocked_users", 1 if is_blocked else -1)
+
+def record_post_created(db: Session):
+    _bump_counter(db, "posts", 1)
+    _bump_daily(db, _day_of(None), "posts", 1)
+
+def record_post_hidden(db: Session):
+    _bump_counter(db, "hidden_posts", 1)
+
+def record_post_deleted(db: Session, db_post: Post):
+    """帖子删除时扣除帖子及其级联删除的评论
+
+    评论按 (创建日期, 是否隐藏) 聚合，每个计数器和每天只更新一次，不加载评论对象。
+    """
+    _bump_counter(db, "posts", -1)
+    _bump_daily(db, _day_of(db_post.created_at), "posts", -1)
+    if db_post.is_hidden:
+        _bump_counter(db, "hidden_posts", -1)
+
+    day_column = func.date(Comment.created_at)
+    total = hidden = 0
+    per_day: Dict[date, int] = {}
+    for day, is_hidden, count in db.query(day_column, Comment.is_hidden, func.count(Comment.id)).filter(
+        Comment.post_id == db_post.id
+    ).group_by(day_column, Comment.is_hidden):
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        day = day or _day_of(None)
+        per_day[day] = per_day.get(day, 0) + count
+        total += count
+        if is_hidden:
+            hidden += count
+    if total:
+        _bump_counter(db, "comments", -total)
+    if hidden:
+        _bump_counter(db, "hidden_comments", -hidden)
+    for day, count in per_day.items():
+        _bump_daily(db, day, "comments", -count)
+
+def record_comment_created(db: Session):
+    _bump_counter(db, "comments", 1)
+    _bump_daily(db, _day_of(None), "comments", 1)
+
+def record_comment_hidden(db: Session):
+    _bump_counter(db, "hidden_comments", 1)
+
+def record_comment_deleted(db: Session, db_comment: Comment):
+    _bump_counter(db, "comments", -1)
+    _bump_daily(db, _day_of(db_comment.created_at), "comments", -1)
+    if db_comment.is_hidden:
+        _bump_counter(db, "hidden_comments", -1)
+
+def get_totals(db: Session) -> Dict[str, int]:
+    """获取全站计数汇总"""
+    totals = dict.fromkeys(COUNTER_NAMES, 0)
+    totals.update(dict(db.query(StatCounter.name, StatCounter.value).all()))
+    return totals
+
+def get_daily_stats(db: Session, days: int = 30) -> List[DailyStats]:
+    """获取最近若干天的按天汇总"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    return db.query(DailyStats).filter(DailyStats.day >= since).order_by(DailyStats.day.asc()).all()
+
+def _count(db: Session, models, condition=None) -> int:
+    total = 0
+    for model in models:
+        query = db.query(func.count(model.id))
+        if condition is not None:
+            query = query.filter(condition(model))
+        total += query.scalar()
+    return total
+
+def compute_from_base_tables(db: Session):
+    """从基础表（含归档表）扫描计算汇总值，用于重建和一致性检查"""
+    posts = (Post, ArchivedPost)
+    comments = (Comment, ArchivedComment)
+    totals = {
+        "users": _count(db, (User,)),
+        "blocked_users": _count(db, (User,), lambda model: model.is_blocked == True),
+        "posts": _count(db, posts),
+        "hidden_posts": _count(db, posts, lambda model: model.is_hidden == True),
+        "comments": _count(db, comments),
+        "hidden_comments": _count(db, comments, lambda model: model.is_hidden == True),
+    }
+
+    daily: Dict[date, Dict[str, int]] = {}
+    sources = (
+        (User, "signups"), (Post, "posts"), (ArchivedPost, "posts"),
+        (Comment, "comments"), (ArchivedComment, "comments")
+    )
+    for model, field in sources:
+        day_column = func.date(model.created_at)
+        for day, count in db.query(day_column, func.count(model.id)).group_by(day_column):
+            if day is None:
+                continue
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            counts = daily.setdefault(day, {"signups": 0, "posts": 0, "comments": 0})
+            counts[field] += count
+    return totals, daily
+
+def rebuild_stats(db: Session):
+    """用基础表的扫描结果重建汇总表"""
+    totals, daily = compute_from_base_tables(db)
+    db.query(StatCounter).delete(synchronize_session=False)
+    db.query(DailyStats).delete(synchronize_session=False)
+    db.bulk_insert_mappings(StatCounter, [{"name": name, "value": value} for name, value in totals.items()])
+    db.bulk_insert_mappings(DailyStats, [{"day": day, **counts} for day, counts in daily.items()])
+    db.commit()
+
+def check_stats(db: Session) -> List[str]:
+    """比较汇总表和基础表，返回不一致项的描述，为空表示一致"""
+    expected_totals, expected_daily = compute_from_base_tables(db)
+    problems = []
+
+    actual_totals = get_totals(db)
+    for name, expected in expected_totals.items():
+        if actual_totals.get(name, 0) != expected:
+            problems.append(f"{name}: 汇总 {actual_totals.get(name, 0)}，实际 {expected}")
+
+    actual_daily = {
+        row.day: {"signups": row.signups, "posts": row.posts, "comments": row.comments}
+        for row in db.query(DailyStats).all()
+    }
+    empty = {"signups": 0, "posts": 0, "comments": 0}
+    for day in sorted(set(expected_daily) | set(actual_daily)):
+        expected = expected_daily.get(day, empty)
+        actual = actual_daily.get(day, empty)
+        for field in ("signups", "posts", "comments"):
+            if actual[field] != expected[field]:
+                problems.append(f"{day} {field}: 汇总 {actual[field]}，实际 {expected[field]}")
+    return problems
\ No newline at end of file
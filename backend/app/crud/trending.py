@@ -0,0 +1,131 @@
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.database import SessionLocal, dialect_insert
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.trending import PostScore, TrendingState
+
+# 热度分 = Σ 2^((活跃时间 - 参考时间) / 半衰期)
+# 所有帖子的分数折算到同一个参考时间，排序不随时间变化；后台衰减只是推进参考时间并整体缩放。
+
+def _half_life_seconds() -> float:
+    return settings.trending_half_life_hours * 3600
+
+def _to_timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # SQLite 中的 CURRENT_TIMESTAMP 为 UTC
+    return value.timestamp()
+
+def get_reference_time(db: Session) -> Optional[float]:
+    state = db.query(TrendingState).filter(TrendingState.id == 1).first()
+    return state.reference_time if state else None
+
+def _weight(reference_time: float, at: float, weight: float) -> float:
+    return weight * 2 ** ((at - reference_time) / _half_life_seconds())
+
+def add_activity(db: Session, post_id: str, weight: float, at: Optional[float] = None):
+    """累加帖子活跃度（不提交，随调用方的事务一起提交）
+
+    weight 为负数时扣除对应时间点的活跃度，例如评论被隐藏。
+    在数据库中原子累加，并发的会话、多进程和写合并批次之间不会互相覆盖。
+    """
+    reference_time = get_reference_time(db)
+    if reference_time is None:
+        return  # 热门表尚未初始化，首次衰减时会从基础表重建
+    delta = _weight(reference_time, at if at is not None else time.time(), weight)
+
+    new_score = case((PostScore.score + delta > 0, PostScore.score + delta), else_=0.0)
+    if delta > 0:
+        insert = dialect_insert(db)
+        db.execute(insert(PostScore).values(post_id=post_id, score=delta).on_conflict_do_update(
+            index_elements=[PostScore.post_id],
+            set_={"score": new_score}
+        ))
+    else:
+        # 扣除时不为没有热度分的帖子插入记录
+        db.execute(
+            update(PostScore).where(PostScore.post_id == post_id).values(score=new_score),
+            execution_options={"synchronize_session": False}
+        )
+
+def remove_comment_activity(db: Session, db_comment: Comment):
+    """扣除评论计入的活跃度（不提交）"""
+    add_activity(
+        db, db_comment.post_id, -settings.trending_comment_weight,
+        at=_to_timestamp(db_comment.created_at)
+    )
+
+def remove_post(db: Session, post_id: str):
+    """帖子被隐藏或删除时移出热门表（不提交）"""
+    db.query(PostScore).filter(PostScore.post_id == post_id).delete(synchronize_session=False)
+
+def get_trending_posts(db: Session, skip: int = 0, limit: int = 20) -> List[Post]:
+    """按热度分获取帖子列表：沿 score 索引倒序扫描，再按主键取帖子"""
+    return db.query(Post).join(PostScore, PostScore.post_id == Post.id).options(
+        joinedload(Post.author)
+    ).filter(Post.is_hidden == False).order_by(PostScore.score.desc()).offset(skip).limit(limit).all()
+
+def rebuild_scores(db: Session, now: float):
+    """从帖子和评论基础表重建热度分（不提交），只统计最近 20 个半衰期内的活跃度"""
+    since = datetime.fromtimestamp(now - 20 * _half_life_seconds(), tz=timezone.utc).replace(tzinfo=None)
+    scores = {}
+
+    posts = db.query(Post.id, Post.created_at).filter(Post.is_hidden == False, Post.created_at >= since)
+    for post_id, created_at in posts:
+        scores[post_id] = scores.get(post_id, 0.0) + _weight(now, _to_timestamp(created_at), settings.trending_post_weight)
+
+    comments = db.query(Comment.post_id, Comment.created_at).join(Post, Post.id == Comment.post_id).filter(
+        Comment.is_hidden == False, Post.is_hidden == False, Comment.created_at >= since
+    )
+    for post_id, created_at in comments:
+        scores[post_id] = scores.get(post_id, 0.0) + _weight(now, _to_timestamp(created_at), settings.trending_comment_weight)
+
+    db.query(PostScore).delete(synchronize_session=False)
+    db.bulk_insert_mappings(PostScore, [
+        {"post_id": post_id, "score": score}
+        for post_id, score in scores.items() if score >= settings.trending_min_score
+    ])
+
+def decay_scores(db: Session, now: Optional[float] = None) -> bool:
+    """推进参考时间并整体衰减热度分，删除低于阈值的帖子
+
+    多个进程同时执行时，通过参考时间做乐观并发控制，只有一个进程的衰减会生效。
+    返回 True 表示本次执行了衰减或重建。
+    """
+    now = now if now is not None else time.time()
+    reference_time = get_reference_time(db)
+
+    if reference_time is None:
+        db.add(TrendingState(id=1, reference_time=now))
+        rebuild_scores(db, now)
+        db.commit()
+        return True
+
+    updated = db.query(TrendingState).filter(
+        TrendingState.id == 1, TrendingState.reference_time == reference_time
+    ).update({TrendingState.reference_time: now}, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        return False
+
+    factor = 2 ** (-(now - reference_time) / _half_life_seconds())
+    db.query(PostScore).update({PostScore.score: PostScore.score * factor}, synchronize_session=False)
+    db.query(PostScore).filter(PostScore.score < settings.trending_min_score).delete(synchronize_session=False)
+    db.commit()
+    return True
+
+def run_decay_pass():
+    """后台任务入口"""
+    db = SessionLocal()
+    try:
+        decay_scores(db)
+    finally:
+        db.close()
\ No newline at end of file
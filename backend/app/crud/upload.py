@@ -0,0 +1,170 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.upload import UploadSession, UploadChunk
+
+logger = logging.getLogger(__name__)
+
+Range = Tuple[int, int]  # [start, end)
+
+# 临时文件
+
+def tmp_file_path(session_id: str) -> str:
+    return os.path.join(settings.upload_tmp_path, f"{session_id}.part")
+
+def _preallocate(path: str, size: int):
+    """预分配文件空间，分片可以按任意顺序直接写到各自的位置"""
+    with open(path, "wb") as f:
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass  # 文件系统不支持时退回到稀疏文件
+        f.truncate(size)
+
+def write_chunk(session_id: str, offset: int, data: bytes):
+    """把分片写到临时文件的指定位置；阻塞调用，应在线程池中执行"""
+    with open(tmp_file_path(session_id), "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+def remove_tmp_file(session_id: str):
+    try:
+        os.remove(tmp_file_path(session_id))
+    except FileNotFoundError:
+        pass
+
+# 会话
+
+def create_session(db: Session, user_id: str, filename: str, size: int) -> UploadSession:
+    """创建上传会话并预分配临时文件"""
+    os.makedirs(settings.upload_tmp_path, exist_ok=True)
+    db_session = UploadSession(user_id=user_id, filename=filename, size=size)
+    db.add(db_session)
+    db.flush()
+    _preallocate(tmp_file_path(db_session.id), size)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+def get_session(db: Session, session_id: str, user_id: str) -> Optional[UploadSession]:
+    """获取用户自己的上传会话"""
+    return db.query(UploadSession).filter(
+        UploadSession.id == session_id,
+        UploadSession.user_id == user_id
+    ).first()
+
+def count_user_sessions(db: Session, user_id: str) -> int:
+    return db.query(func.count(UploadSession.id)).filter(UploadSession.user_id == user_id).scalar()
+
+def store_chunk(db: Session, session_id: str, user_id: str, offset: int, data: bytes) -> Optional[UploadSession]:
+    """写入分片并记录，会话已不存在（已完成、取消或过期清理）时返回 None；阻塞调用，应在线程池中执行
+
+    先更新会话的活动时间以取得写锁，再写文件和记录分片，最后一起提交：完成、取消和清理都要删除会话记录，
+    需要同一把锁，因此不会与分片写入交错，校验过或已移走的文件不会再被写入。
+    临时文件不存在时抛出 FileNotFoundError。
+    """
+    updated = db.query(UploadSession).filter(
+        UploadSession.id == session_id,
+        UploadSession.user_id == user_id
+    ).update({UploadSession.updated_at: func.now()}, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        return None
+    try:
+        write_chunk(session_id, offset, data)
+        db.merge(UploadChunk(session_id=session_id, offset=offset, length=len(data)))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return get_session(db, session_id, user_id)
+
+def get_received_ranges(db: Session, session_id: str) -> List[Range]:
+    """已收到的字节区间（合并相邻和重叠的分片）"""
+    chunks = db.query(UploadChunk.offset, UploadChunk.length).filter(
+        UploadChunk.session_id == session_id
+    ).order_by(UploadChunk.offset).all()
+    ranges: List[Range] = []
+    for offset, length in chunks:
+        end = offset + length
+        if ranges and offset <= ranges[-1][1]:
+            if end > ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((offset, end))
+    return ranges
+
+def contiguous_offset(ranges: List[Range]) -> int:
+    """从文件开头起连续收到的字节数，顺序上传的客户端从这里继续"""
+    if ranges and ranges[0][0] == 0:
+        return ranges[0][1]
+    return 0
+
+def missing_ranges(ranges: List[Range], size: int) -> List[Range]:
+    """尚未收到的字节区间，并行上传的客户端据此补传"""
+    missing = []
+    position = 0
+    for start, end in ranges:
+        if start > position:
+            missing.append((position, start))
+        position = max(position, end)
+    if position < size:
+        missing.append((position, size))
+    return missing
+
+def _delete_rows(db: Session, session_id: str) -> int:
+    db.query(UploadChunk).filter(UploadChunk.session_id == session_id).delete(synchronize_session=False)
+    return db.query(UploadSession).filter(UploadSession.id == session_id).delete(synchronize_session=False)
+
+def claim_session(db: Session, session_id: str) -> bool:
+    """删除会话记录，临时文件交给调用方处理；并发完成同一个会话时只有一个请求能成功"""
+    claimed = _delete_rows(db, session_id)
+    db.commit()
+    return bool(claimed)
+
+def delete_session(db: Session, session_id: str) -> bool:
+    """删除会话及其临时文件；会话已被其他请求领取（正在完成）时不动临时文件"""
+    deleted = _delete_rows(db, session_id)
+    db.commit()
+    if deleted:
+        remove_tmp_file(session_id)
+    return bool(deleted)
+
+# 清理
+
+def cleanup_expired_sessions() -> int:
+    """清理长时间没有活动的会话和没有会话记录的临时文件，返回清理的会话数"""
+    ttl = settings.upload_session_ttl
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+    db = SessionLocal()
+    try:
+        expired = [
+            row[0] for row in db.query(UploadSession.id).filter(UploadSession.updated_at < cutoff)
+        ]
+        for session_id in expired:
+            delete_session(db, session_id)
+
+        if os.path.isdir(settings.upload_tmp_path):
+            active = {row[0] for row in db.query(UploadSession.id)}
+            for name in os.listdir(settings.upload_tmp_path):
+                path = os.path.join(settings.upload_tmp_path, name)
+                if name.endswith(".part") and name[:-len(".part")] in active:
+                    continue
+                if os.path.isfile(path) and os.path.getmtime(path) < time.time() - ttl:
+                    os.remove(path)
+    finally:
+        db.close()
+
+    if expired:
+        logger.info("已清理 %d 个过期的上传会话", len(expired))
+    return len(expired)
@@ -1,8 +1,14 @@
+import time
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
-from typing import Optional
+from app.core.security import get_password_hash, hash_passwords, verify_password
+from app.core.ids import new_id
+from app.core import invalidation
+from app.crud import stats
+from typing import Optional, List, Set
 
 def get_user(db: Session, user_id: str) -> Optional[User]:
     """根据ID获取用户"""
@@ -25,10 +31,97 @@ def create_user(db: Session, user: UserCreate) -> User:
         hashed_password=hashed_password
     )
     db.add(db_user)
+    stats.record_user_created(db)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+# 批量创建
+
+IN_CHUNK_SIZE = 500  # 单条 IN 查询的参数个数，低于 SQLite 的变量数上限
+
+def _existing_values(db: Session, column, values: Set[str]) -> Set[str]:
+    """一批值中已被占用的部分，按块执行 IN 查询"""
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start:start + IN_CHUNK_SIZE]
+        existing.update(row[0] for row in db.query(column).filter(column.in_(chunk)))
+    return existing
+
+def _mark_conflicts(db: Session, users: List[UserCreate], results: List[dict], pending: List[int]) -> List[int]:
+    """把用户名或邮箱已存在的行标记为失败，返回仍可创建的行"""
+    taken_usernames = _existing_values(db, User.username, {users[i].username for i in pending})
+    taken_emails = _existing_values(db, User.email, {users[i].email for i in pending})
+    remaining = []
+    for i in pending:
+        if users[i].username in taken_usernames:
+            results[i].update(status="error", detail="用户名已存在")
+        elif users[i].email in taken_emails:
+            results[i].update(status="error", detail="邮箱已存在")
+        else:
+            remaining.append(i)
+    return remaining
+
+def bulk_create_users(db: Session, users: List[UserCreate], rounds: Optional[int] = None) -> dict:
+    """批量创建用户，返回每一行的结果
+
+    冲突检查按集合查询，密码哈希在进程池中并行计算（不占用数据库事务），
+    全部通过的行在一个事务中插入。检查和插入之间被并发注册占用时回滚，重新检查后再插入剩余的行。
+    """
+    timings = {}
+    began = time.perf_counter()
+    results = [
+        {"index": i, "username": user.username, "email": user.email, "status": "created", "id": None, "detail": None}
+        for i, user in enumerate(users)
+    ]
+
+    # 批次内部的重复：保留第一次出现的行
+    pending = []
+    seen_usernames, seen_emails = set(), set()
+    for i, user in enumerate(users):
+        if user.username in seen_usernames:
+            results[i].update(status="error", detail="用户名在本批次中重复")
+        elif user.email in seen_emails:
+            results[i].update(status="error", detail="邮箱在本批次中重复")
+        else:
+            pending.append(i)
+        seen_usernames.add(user.username)
+        seen_emails.add(user.email)
+
+    pending = _mark_conflicts(db, users, results, pending)
+    db.rollback()  # 结束只读事务，哈希期间不持有数据库连接上的事务
+    timings["check"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    hashes = dict(zip(pending, hash_passwords([users[i].password for i in pending], rounds=rounds)))
+    timings["hash"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    for attempt in range(3):
+        rows = [
+            {"id": new_id(), "username": users[i].username, "email": users[i].email, "hashed_password": hashes[i]}
+            for i in pending
+        ]
+        try:
+            if rows:
+                db.execute(insert(User), rows)
+                stats.record_user_created(db, len(rows))
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == 2:
+                raise
+            pending = _mark_conflicts(db, users, results, pending)
+            db.rollback()
+    for i, row in zip(pending, rows):
+        results[i]["id"] = row["id"]
+    timings["insert"] = time.perf_counter() - began
+
+    created = len(pending)
+    return {"created": created, "failed": len(users) - created, "timings": timings, "results": results}
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """验证用户"""
     user = get_user_by_username(db, username)
@@ -40,15 +133,45 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    """获取用户列表"""
-    return db.query(User).offset(skip).limit(limit).all()
+def _prefix_range(column, prefix: str):
+    """前缀匹配写成范围条件，可以直接使用列上的索引"""
+    return (column >= prefix) & (column < prefix + "\uffff")
+
+def get_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    q: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    is_blocked: Optional[bool] = None
+) -> List[User]:
+    """获取用户列表，q 为用户名或邮箱前缀"""
+    query = db.query(User)
+    if q:
+        query = query.filter(_prefix_range(User.username, q) | _prefix_range(User.email, q))
+    if role is not None:
+        query = query.filter(User.role == role)
+    if is_blocked is not None:
+        query = query.filter(User.is_blocked == is_blocked)
+    if q:
+        query = query.order_by(User.username.asc())
+    return query.offset(skip).limit(limit).all()
+
+def search_usernames(db: Session, prefix: str, limit: int = 10) -> List[User]:
+    """按用户名前缀查找未屏蔽用户（用于@提及输入提示）"""
+    return db.query(User).filter(
+        _prefix_range(User.username, prefix),
+        User.is_blocked == False
+    ).order_by(User.username.asc()).limit(limit).all()
 
 def update_user_block_status(db: Session, user_id: str, is_blocked: bool) -> Optional[User]:
     """更新用户屏蔽状态"""
     user = db.query(User).filter(User.id == user_id).first()
     if user:
+        if user.is_blocked != is_blocked:
+            stats.record_user_block_changed(db, is_blocked)
         user.is_blocked = is_blocked
+        invalidation.publish(invalidation.USER_CHANGED, user_id, db=db)
         db.commit()
         db.refresh(user)
     return user
\ No newline at end of file
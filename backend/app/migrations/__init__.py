@@ -0,0 +1,24 @@
+from .base import Migration, TableRewriteMigration
+from .runner import run_migration, get_status, connect
+from .m0001_image_urls import ImageUrlsMigration
+from .m0002_user_filter_indexes import UserFilterIndexesMigration
+from .m0003_comment_post_index import CommentPostIndexMigration
+from .m0004_compact_ids import COMPACT_ID_MIGRATIONS, COMPACT_ID_SWAP
+from .m0006_post_views import PostViewsMigration
+from .m0007_created_at_indexes import CreatedAtIndexesMigration
+
+# 按执行顺序注册的迁移
+MIGRATIONS = [
+    ImageUrlsMigration(),
+    UserFilterIndexesMigration(),
+    CommentPostIndexMigration(),
+    *COMPACT_ID_MIGRATIONS,
+    COMPACT_ID_SWAP,
+    PostViewsMigration(),
+    CreatedAtIndexesMigration(),
+]
+
+__all__ = [
+    "Migration", "TableRewriteMigration", "MIGRATIONS",
+    "run_migration", "get_status", "connect"
+]
\ No newline at end of file
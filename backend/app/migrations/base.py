@@ -0,0 +1,138 @@
+import sqlite3
+from typing import List, Optional, Tuple
+
+class Migration:
+    """可分批执行的迁移基类
+
+    子类实现以下步骤，由 runner 负责事务、检查点和进度：
+    - is_needed: 判断是否需要执行
+    - prepare: 短小的结构变更（需幂等，中断后恢复时会再次执行）
+    - count_rows: 估算需要处理的总行数，用于计算进度和预计剩余时间
+    - run_batch: 处理 last_key 之后的一批数据，返回 (新的 last_key, 处理行数)，没有数据时返回 None
+    - finalize: 收尾操作，在一个短事务中完成
+    """
+
+    name: str = ""
+    description: str = ""
+
+    def is_needed(self, conn: sqlite3.Connection) -> bool:
+        return True
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        pass
+
+    def count_rows(self, conn: sqlite3.Connection) -> int:
+        return 0
+
+    def run_batch(self, conn: sqlite3.Connection, last_key: Optional[int], batch_size: int) -> Optional[Tuple[int, int]]:
+        return None
+
+    def finalize(self, conn: sqlite3.Connection):
+        pass
+
+def get_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """获取表的列名"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+class TableRewriteMigration(Migration):
+    """在线重建表：新表 + 触发器同步增量 + 按 rowid 分批回填 + 短事务切换
+
+    迁移期间 API 对旧表的写入会由触发器同步到新表；回填使用 INSERT OR IGNORE，
+    不会覆盖触发器写入的较新数据。所有数据复制完成后在一个短事务中删除旧表并重命名新表。
+    """
+
+    table: str = ""
+    new_table_sql: str = ""  # 以 {table} 作为新表名占位符
+    # 新表列名 -> 从旧表取值的 SQL 表达式（表达式中用 {row} 代表旧表行，如 {row}.title）
+    column_exprs: dict = {}
+    # 触发器同步增量时使用的表达式，默认与回填相同（用于回填依赖迁移连接上注册的函数的情况）
+    trigger_column_exprs: dict = {}
+    index_sqls: List[str] = []  # 切换后需要重建的索引
+
+    @property
+    def new_table(self) -> str:
+        return f"{self.table}_new"
+
+    def _trigger_names(self) -> List[str]:
+        return [f"{self.new_table}_sync_{op}" for op in ("insert", "update", "delete")]
+
+    def _values(self, row: str) -> str:
+        return ", ".join(expr.format(row=row) for expr in self.column_exprs.values())
+
+    def _trigger_values(self, row: str) -> str:
+        exprs = self.trigger_column_exprs or self.column_exprs
+        return ", ".join(exprs[column].format(row=row) for column in self.column_exprs)
+
+    def _columns(self) -> str:
+        return ", ".join(self.column_exprs.keys())
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        if fresh:
+            # 清理上次未记录检查点就中断的残留
+            for trigger in self._trigger_names():
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute(f"DROP TABLE IF EXISTS {self.new_table}")
+
+        if not table_exists(conn, self.new_table):
+            conn.execute(self.new_table_sql.format(table=self.new_table))
+
+        insert_trigger, update_trigger, delete_trigger = self._trigger_names()
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {insert_trigger} AFTER INSERT ON {self.table}
+            BEGIN
+                INSERT OR REPLACE INTO {self.new_table} (rowid, {self._columns()})
+                VALUES (NEW.rowid, {self._trigger_values("NEW")});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {update_trigger} AFTER UPDATE ON {self.table}
+            BEGIN
+                DELETE FROM {self.new_table} WHERE rowid = OLD.rowid;
+                INSERT OR REPLACE INTO {self.new_table} (rowid, {self._columns()})
+                VALUES (NEW.rowid, {self._trigger_values("NEW")});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {delete_trigger} AFTER DELETE ON {self.table}
+            BEGIN
+                DELETE FROM {self.new_table} WHERE rowid = OLD.rowid;
+            END
+        """)
+
+    def count_rows(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def run_batch(self, conn: sqlite3.Connection, last_key: Optional[int], batch_size: int) -> Optional[Tuple[int, int]]:
+        last_key = last_key or 0
+        # 跳过已由触发器同步的行：迁移开始后插入的行都已在新表中，持续写入时回填也能结束
+        upper, rows = conn.execute(
+            f"SELECT MAX(rowid), COUNT(*) FROM ("
+            f"SELECT rowid FROM {self.table} AS old WHERE rowid > ? "
+            f"AND NOT EXISTS (SELECT 1 FROM {self.new_table} WHERE rowid = old.rowid) "
+            f"ORDER BY rowid LIMIT ?)",
+            (last_key, batch_size)
+        ).fetchone()
+        if not rows:
+            return None
+
+        conn.execute(
+            f"INSERT OR IGNORE INTO {self.new_table} (rowid, {self._columns()}) "
+            f"SELECT rowid, {self._values(self.table)} FROM {self.table} "
+            f"WHERE rowid > ? AND rowid <= ?",
+            (last_key, upper)
+        )
+        return upper, rows
+
+    def finalize(self, conn: sqlite3.Connection):
+        for trigger in self._trigger_names():
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute(f"DROP TABLE {self.table}")
+        conn.execute(f"ALTER TABLE {self.new_table} RENAME TO {self.table}")
+        for index_sql in self.index_sqls:
+            conn.execute(index_sql)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import sqlite3
+
+from .base import TableRewriteMigration, get_columns
+
+class ImageUrlsMigration(TableRewriteMigration):
+    """将旧的单图 image_url 列迁移为 image_urls 数组，并删除 image_url 列
+
+    已有 image_urls 的行保持不变；否则把 image_url 转成单元素数组，没有图片的设为空数组。
+    """
+
+    name = "0001_image_urls"
+    description = "posts.image_url -> posts.image_urls"
+    table = "posts"
+    new_table_sql = """
+        CREATE TABLE {table} (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            image_urls TEXT,
+            author_id TEXT NOT NULL,
+            is_hidden INTEGER DEFAULT 0 NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
+            FOREIGN KEY (author_id) REFERENCES users (id)
+        )
+    """
+    column_exprs = {
+        "id": "{row}.id",
+        "title": "{row}.title",
+        "content": "{row}.content",
+        "image_urls": (
+            "CASE WHEN {row}.image_urls IS NOT NULL THEN {row}.image_urls "
+            "WHEN {row}.image_url IS NOT NULL AND {row}.image_url != '' THEN json_array({row}.image_url) "
+            "ELSE '[]' END"
+        ),
+        "author_id": "{row}.author_id",
+        "is_hidden": "{row}.is_hidden",
+        "created_at": "{row}.created_at",
+        "updated_at": "{row}.updated_at",
+    }
+
+    def is_needed(self, conn: sqlite3.Connection) -> bool:
+        return "image_url" in get_columns(conn, self.table)
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        # ADD COLUMN 在 SQLite 中只修改表结构，不会重写数据
+        if "image_urls" not in get_columns(conn, self.table):
+            conn.execute(f"ALTER TABLE {self.table} ADD COLUMN image_urls TEXT")
+        super().prepare(conn, fresh)
\ No newline at end of file
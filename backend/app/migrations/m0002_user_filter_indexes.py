@@ -0,0 +1,13 @@
+import sqlite3
+
+from .base import Migration
+
+class UserFilterIndexesMigration(Migration):
+    """为用户列表的角色和屏蔽状态筛选补建索引（新建的数据库由模型直接创建）"""
+
+    name = "0002_user_filter_indexes"
+    description = "users.role / users.is_blocked 索引"
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_users_is_blocked ON users (is_blocked)")
\ No newline at end of file
@@ -0,0 +1,12 @@
+import sqlite3
+
+from .base import Migration
+
+class CommentPostIndexMigration(Migration):
+    """为 comments.post_id 补建索引，按帖子取评论和批量统计评论数时使用"""
+
+    name = "0003_comment_post_index"
+    description = "comments.post_id 索引"
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_comments_post_id ON comments (post_id)")
\ No newline at end of file
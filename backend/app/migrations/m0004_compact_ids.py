@@ -0,0 +1,114 @@
+import sqlite3
+import uuid
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from .base import Migration, TableRewriteMigration, get_columns, table_exists
+
+# 表 -> 需要从 36 字符文本转成 16 字节二进制的 ID 列
+ID_COLUMNS = {
+    "users": ["id"],
+    "posts": ["id", "author_id"],
+    "comments": ["id", "post_id", "author_id"],
+    "post_scores": ["post_id"],
+    "posts_archive": ["id", "author_id"],
+    "comments_archive": ["id", "post_id", "author_id"],
+    "image_metadata": ["uploader_id"],
+    "upload_sessions": ["id", "user_id"],
+    "upload_chunks": ["session_id"],
+}
+
+def uuid_blob(value):
+    """UUID 文本 -> 16 字节；已是二进制或不是合法 UUID 的值原样返回"""
+    if not isinstance(value, str):
+        return value
+    try:
+        return uuid.UUID(value).bytes
+    except ValueError:
+        return value
+
+def register_functions(conn: sqlite3.Connection):
+    conn.create_function("uuid_blob", 1, uuid_blob, deterministic=True)
+
+def _model_table(name: str):
+    from app.core.database import Base
+    import app.models  # noqa: F401  注册全部模型
+    return Base.metadata.tables[name]
+
+class CompactIdTableMigration(TableRewriteMigration):
+    """按模型定义重建表，把 ID 列回填为二进制
+
+    回填用迁移连接上注册的 uuid_blob 函数；API 的连接没有这个函数，所以触发器同步增量时
+    原样写入文本，切换前由 CompactIdSwapMigration 统一转换。本迁移完成后不切换表，
+    影子表由触发器保持同步，所有表一起在 0005 中切换，避免部分表已切换时新旧格式混用。
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.name = f"0004_compact_ids_{table}"
+        self.description = f"{table} ID 列转为 16 字节二进制"
+        self.id_columns = ID_COLUMNS[table]
+
+        model_table = _model_table(table)
+        dialect = sqlite.dialect()
+        ddl = str(CreateTable(model_table).compile(dialect=dialect)).strip()
+        self.new_table_sql = ddl.replace(f"CREATE TABLE {table} ", "CREATE TABLE {table} ", 1)
+        self.index_sqls = [
+            str(CreateIndex(index).compile(dialect=dialect)).replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1)
+            for index in model_table.indexes
+        ]
+        self.column_exprs = {
+            column.name: f"uuid_blob({{row}}.{column.name})" if column.name in self.id_columns else f"{{row}}.{column.name}"
+            for column in model_table.columns
+        }
+        self.trigger_column_exprs = {column: f"{{row}}.{column}" for column in self.column_exprs}
+
+    def is_needed(self, conn: sqlite3.Connection) -> bool:
+        if not table_exists(conn, self.table):
+            return False
+        types = {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        return types.get(self.id_columns[0]) != "BLOB"
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        register_functions(conn)
+        # 只复制旧表已有的列；后续迁移才添加的列（如 0006 的 views）在新表中取默认值
+        existing = set(get_columns(conn, self.table))
+        self.column_exprs = {column: expr for column, expr in self.column_exprs.items() if column in existing}
+        super().prepare(conn, fresh)
+
+    def finalize(self, conn: sqlite3.Connection):
+        pass  # 由 CompactIdSwapMigration 统一切换
+
+    def swap(self, conn: sqlite3.Connection):
+        """转换触发器写入的文本 ID，然后删除旧表、重命名影子表并重建索引"""
+        for column in self.id_columns:
+            conn.execute(
+                f"UPDATE {self.new_table} SET {column} = uuid_blob({column}) WHERE typeof({column}) = 'text'"
+            )
+        super().finalize(conn)
+
+class CompactIdSwapMigration(Migration):
+    """在一个短事务中切换所有已回填的表；切换后需要立即以新版本代码重启 API"""
+
+    name = "0005_compact_ids_swap"
+    description = "切换为二进制 ID 的表"
+
+    def __init__(self, table_migrations):
+        self.table_migrations = table_migrations
+
+    def is_needed(self, conn: sqlite3.Connection) -> bool:
+        return any(table_exists(conn, m.new_table) for m in self.table_migrations)
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        register_functions(conn)
+
+    def finalize(self, conn: sqlite3.Connection):
+        for migration in self.table_migrations:
+            if table_exists(conn, migration.new_table):
+                migration.swap(conn)
+            elif migration.is_needed(conn):
+                raise RuntimeError(f"表 {migration.table} 尚未回填，请先执行 {migration.name}")
+
+COMPACT_ID_MIGRATIONS = [CompactIdTableMigration(table) for table in ID_COLUMNS]
+COMPACT_ID_SWAP = CompactIdSwapMigration(COMPACT_ID_MIGRATIONS)
@@ -0,0 +1,19 @@
+import sqlite3
+
+from .base import Migration, get_columns, table_exists
+
+TABLES = ["posts", "posts_archive"]
+
+class PostViewsMigration(Migration):
+    """为帖子和归档帖子添加浏览数列（ADD COLUMN 只修改表结构，不重写数据）"""
+
+    name = "0006_post_views"
+    description = "posts.views / posts_archive.views"
+
+    def is_needed(self, conn: sqlite3.Connection) -> bool:
+        return any(table_exists(conn, table) and "views" not in get_columns(conn, table) for table in TABLES)
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        for table in TABLES:
+            if table_exists(conn, table) and "views" not in get_columns(conn, table):
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN views INTEGER DEFAULT 0 NOT NULL")
@@ -0,0 +1,16 @@
+import sqlite3
+
+from .base import Migration, table_exists
+
+TABLES = ["users", "posts", "comments"]
+
+class CreatedAtIndexesMigration(Migration):
+    """为导出的键集分页补建 (created_at, id) 索引"""
+
+    name = "0007_created_at_indexes"
+    description = "users/posts/comments (created_at, id) 索引"
+
+    def prepare(self, conn: sqlite3.Connection, fresh: bool):
+        for table in TABLES:
+            if table_exists(conn, table):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_created_id ON {table} (created_at, id)")
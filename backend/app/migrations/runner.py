@@ -0,0 +1,157 @@
+import sqlite3
+import time
+from typing import Callable, List, Optional
+
+from app.core.database import get_sqlite_path
+from .base import Migration
+
+CHECKPOINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    name TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    last_key INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    total_rows INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """打开迁移用连接：手动管理事务，遇到 API 持有写锁时等待而不是报错"""
+    conn = sqlite3.connect(db_path or get_sqlite_path(), isolation_level=None, timeout=30)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute(CHECKPOINT_TABLE_SQL)
+    return conn
+
+def get_checkpoint(conn: sqlite3.Connection, name: str) -> Optional[sqlite3.Row]:
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute("SELECT * FROM schema_migrations WHERE name = ?", (name,)).fetchone()
+    finally:
+        conn.row_factory = None
+
+def get_status(conn: sqlite3.Connection, migrations: List[Migration]) -> List[dict]:
+    """获取各迁移的执行状态"""
+    result = []
+    for migration in migrations:
+        checkpoint = get_checkpoint(conn, migration.name)
+        result.append({
+            "name": migration.name,
+            "description": migration.description,
+            "status": checkpoint["status"] if checkpoint else "pending",
+            "rows_done": checkpoint["rows_done"] if checkpoint else 0,
+            "total_rows": checkpoint["total_rows"] if checkpoint else 0,
+        })
+    return result
+
+def format_progress(name: str, done: int, total: int, processed: int, elapsed: float) -> str:
+    """格式化进度和预计剩余时间（速率按本次运行处理的行数计算）"""
+    rate = processed / elapsed if elapsed > 0 else 0
+    percent = done * 100 / total if total else 100
+    remaining = max(total - done, 0)
+    eta = f"{remaining / rate:.0f}s" if rate > 0 else "未知"
+    return f"[{name}] {done}/{total} ({percent:.1f}%) {rate:.0f} 行/秒 预计剩余 {eta}"
+
+def run_migration(
+    migration: Migration,
+    batch_size: int = 500,
+    sleep: float = 0.05,
+    db_path: Optional[str] = None,
+    report: Callable[[str], None] = print
+) -> bool:
+    """分批执行迁移，每批一个短事务并同时更新检查点，中断后再次运行会从检查点继续
+
+    sleep 为每批之间让出数据库的时间，保证 API 在迁移期间能继续读写。
+    返回 True 表示本次执行了迁移。
+    """
+    conn = connect(db_path)
+    try:
+        checkpoint = get_checkpoint(conn, migration.name)
+        if checkpoint and checkpoint["status"] == "done":
+            report(f"[{migration.name}] 已完成，跳过")
+            return False
+
+        if checkpoint is None and not migration.is_needed(conn):
+            now = time.time()
+            conn.execute(
+                "INSERT INTO schema_migrations (name, status, started_at, updated_at, finished_at) "
+                "VALUES (?, 'done', ?, ?, ?)",
+                (migration.name, now, now, now)
+            )
+            report(f"[{migration.name}] 无需迁移")
+            return False
+
+        # 准备阶段：结构变更，短事务
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration.prepare(conn, fresh=checkpoint is None)
+            total = migration.count_rows(conn)
+            now = time.time()
+            if checkpoint is None:
+                conn.execute(
+                    "INSERT INTO schema_migrations (name, status, last_key, total_rows, started_at, updated_at) "
+                    "VALUES (?, 'running', NULL, ?, ?, ?)",
+                    (migration.name, total, now, now)
+                )
+                last_key, rows_done = None, 0
+            else:
+                conn.execute(
+                    "UPDATE schema_migrations SET total_rows = ?, updated_at = ? WHERE name = ?",
+                    (total, now, migration.name)
+                )
+                last_key, rows_done = checkpoint["last_key"], checkpoint["rows_done"]
+                report(f"[{migration.name}] 从检查点恢复：已处理 {rows_done} 行")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        # 分批阶段：每批处理和检查点更新在同一个事务中
+        start = time.monotonic()
+        resumed_from = rows_done
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = migration.run_batch(conn, last_key, batch_size)
+                if result is not None:
+                    last_key, rows = result
+                    rows_done += rows
+                    conn.execute(
+                        "UPDATE schema_migrations SET last_key = ?, rows_done = ?, updated_at = ? WHERE name = ?",
+                        (last_key, rows_done, time.time(), migration.name)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            if result is None:
+                break
+            report(format_progress(
+                migration.name, rows_done, max(total, rows_done),
+                rows_done - resumed_from, time.monotonic() - start
+            ))
+            if sleep:
+                time.sleep(sleep)
+
+        # 收尾阶段
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration.finalize(conn)
+            now = time.time()
+            conn.execute(
+                "UPDATE schema_migrations SET status = 'done', updated_at = ?, finished_at = ? WHERE name = ?",
+                (now, now, migration.name)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        report(f"[{migration.name}] 迁移完成，共处理 {rows_done} 行，用时 {time.monotonic() - start:.1f}s")
+        return True
+    finally:
+        conn.close()
\ No newline at end of file
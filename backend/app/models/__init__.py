@@ -1,5 +1,16 @@
 from .user import User, UserRole
 from .post import Post
 from .comment import Comment
+from .trending import PostScore, TrendingState
+from .stats import StatCounter, DailyStats
+from .archive import ArchivedPost, ArchivedComment
+from .image import ImageMeta
+from .upload import UploadSession, UploadChunk
+from .change import PostChange, PostChangeState
 
-__all__ = ["User", "UserRole", "Post", "Comment"]
\ No newline at end of file
+__all__ = [
+    "User", "UserRole", "Post", "Comment",
+    "PostScore", "TrendingState", "StatCounter", "DailyStats",
+    "ArchivedPost", "ArchivedComment", "ImageMeta",
+    "UploadSession", "UploadChunk", "PostChange", "PostChangeState"
+]
\ No newline at end of file
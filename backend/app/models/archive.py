@@ -0,0 +1,61 @@
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Integer, JSON, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+from app.core.ids import CompactId
+
+# 归档表：列与热表一致，不设外键；按ID和作者读取时透明回退到这里，信息流和搜索只查热表
+
+class ArchivedPost(Base):
+    __tablename__ = "posts_archive"
+
+    id = Column(CompactId, primary_key=True)
+    title = Column(String(200), nullable=False)
+    content = Column(Text, nullable=False)
+    image_urls = Column(JSON, nullable=True, default=list)
+    author_id = Column(CompactId, nullable=False)
+    is_hidden = Column(Boolean, default=False, nullable=False)
+    views = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 关系（只读）
+    author = relationship(
+        "User",
+        primaryjoin="foreign(ArchivedPost.author_id) == User.id",
+        viewonly=True
+    )
+    comments = relationship(
+        "ArchivedComment",
+        primaryjoin="ArchivedPost.id == foreign(ArchivedComment.post_id)",
+        viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_posts_archive_author_created", "author_id", "created_at"),
+    )
+
+class ArchivedComment(Base):
+    __tablename__ = "comments_archive"
+
+    id = Column(CompactId, primary_key=True)
+    content = Column(Text, nullable=False)
+    post_id = Column(CompactId, nullable=False, index=True)
+    author_id = Column(CompactId, nullable=False)
+    is_hidden = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 关系（只读）
+    author = relationship(
+        "User",
+        primaryjoin="foreign(ArchivedComment.author_id) == User.id",
+        viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_comments_archive_author_created", "author_id", "created_at"),
+    )
\ No newline at end of file
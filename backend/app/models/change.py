@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.core.ids import CompactId
+
+class PostChange(Base):
+    """帖子变更日志：由写操作在同一事务中追加，seq 即增量同步的游标
+
+    不设外键，删除帖子后墓碑记录仍然保留；AUTOINCREMENT 保证清理后序号也不会被复用。
+    """
+    __tablename__ = "post_changes"
+    __table_args__ = (
+        Index("ix_post_changes_post_id_seq", "post_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    post_id = Column(CompactId, nullable=False)
+    op = Column(String(10), nullable=False)  # created / updated / hidden / deleted
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class PostChangeState(Base):
+    """变更日志的保留边界：序号不大于 horizon 的记录可能已按保留期清理，更早的游标需要重新全量同步"""
+    __tablename__ = "post_change_state"
+
+    id = Column(Integer, primary_key=True)
+    horizon = Column(Integer, nullable=False, default=0)
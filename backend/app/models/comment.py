@@ -1,17 +1,20 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Index, Text, Boolean, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 
 from app.core.database import Base
+from app.core.ids import CompactId, new_id
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_created_id", "created_at", "id"),  # 导出按 (created_at, id) 键集分页
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CompactId, primary_key=True, default=new_id)
     content = Column(Text, nullable=False)
-    post_id = Column(String, ForeignKey("posts.id"), nullable=False)
-    author_id = Column(String, ForeignKey("users.id"), nullable=False)
+    post_id = Column(CompactId, ForeignKey("posts.id"), nullable=False, index=True)
+    author_id = Column(CompactId, ForeignKey("users.id"), nullable=False)
     is_hidden = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
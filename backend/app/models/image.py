@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.core.ids import CompactId
+
+class ImageMeta(Base):
+    """上传时提取的图片元数据，按 URL 查询；客户端据此预留布局并先显示占位图"""
+    __tablename__ = "image_metadata"
+
+    url = Column(String, primary_key=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(16), nullable=False)
+    size = Column(Integer, nullable=False)  # 字节数
+    placeholder = Column(String, nullable=True)  # 极小的 JPEG 缩略图（data URI）
+    uploader_id = Column(CompactId, ForeignKey("users.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
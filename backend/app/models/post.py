@@ -1,19 +1,23 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Index, String, Text, Boolean, DateTime, ForeignKey, Integer, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 
 from app.core.database import Base
+from app.core.ids import CompactId, new_id
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_created_id", "created_at", "id"),  # 导出按 (created_at, id) 键集分页
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CompactId, primary_key=True, default=new_id)
     title = Column(String(200), nullable=False)
     content = Column(Text, nullable=False)
     image_urls = Column(JSON, nullable=True, default=list)
-    author_id = Column(String, ForeignKey("users.id"), nullable=False)
+    author_id = Column(CompactId, ForeignKey("users.id"), nullable=False)
     is_hidden = Column(Boolean, default=False, nullable=False)
+    views = Column(Integer, default=0, server_default="0", nullable=False)  # 由浏览计数器批量写回，略有延迟
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
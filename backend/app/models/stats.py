@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, Date
+
+from app.core.database import Base
+
+class StatCounter(Base):
+    """全站计数汇总（用户数、屏蔽数、帖子数等），由写操作在同一事务中增量维护"""
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class DailyStats(Base):
+    """按天汇总的注册、发帖和评论数（按创建日期统计现存记录）"""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    signups = Column(Integer, nullable=False, default=0)
+    posts = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Float, Integer, ForeignKey
+
+from app.core.database import Base
+from app.core.ids import CompactId
+
+class PostScore(Base):
+    """帖子的热度分（按时间衰减的活跃度），只保存有近期活跃度的可见帖子"""
+    __tablename__ = "post_scores"
+
+    post_id = Column(CompactId, ForeignKey("posts.id"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0, index=True)
+
+class TrendingState(Base):
+    """热度分的参考时间：所有热度分都是折算到该时间点的值，后台衰减时一起推进"""
+    __tablename__ = "trending_state"
+
+    id = Column(Integer, primary_key=True)
+    reference_time = Column(Float, nullable=False)
\ No newline at end of file
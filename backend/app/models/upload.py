@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+from app.core.ids import CompactId, new_id
+
+class UploadSession(Base):
+    """断点续传会话，文件内容保存在临时目录中与会话ID同名的预分配文件里"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(CompactId, primary_key=True, default=new_id)
+    user_id = Column(CompactId, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    # 关系
+    chunks = relationship("UploadChunk", cascade="all, delete-orphan")
+
+class UploadChunk(Base):
+    """已写入的分片；并行上传时每个分片单独一行，互不更新同一行"""
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(CompactId, ForeignKey("upload_sessions.id"), primary_key=True)
+    offset = Column(BigInteger, primary_key=True)
+    length = Column(Integer, nullable=False)
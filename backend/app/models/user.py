@@ -1,10 +1,10 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Index, String, Boolean, DateTime, Enum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
-import uuid
 
 from app.core.database import Base
+from app.core.ids import CompactId, new_id
 
 class UserRole(str, enum.Enum):
     USER = "user"
@@ -12,13 +12,16 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_id", "created_at", "id"),  # 导出按 (created_at, id) 键集分页
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CompactId, primary_key=True, default=new_id)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
-    role = Column(Enum(UserRole), default=UserRole.USER, nullable=False)
-    is_blocked = Column(Boolean, default=False, nullable=False)
+    role = Column(Enum(UserRole), default=UserRole.USER, nullable=False, index=True)
+    is_blocked = Column(Boolean, default=False, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 关系
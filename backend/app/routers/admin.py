@@ -1,28 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
+from app.core import backup
+from app.core.config import settings
 from app.core.database import get_db
 from app.dependencies.auth import get_admin_user
-from app.schemas.user import User
+from app.schemas.user import User, BulkUserCreate, BulkUserCreateResult
+from app.models.user import UserRole
 from app.schemas.post import Post
 from app.schemas.comment import Comment
-from app.crud import user as user_crud, post as post_crud, comment as comment_crud
+from app.schemas.stats import AdminStats
+from app.crud import user as user_crud, post as post_crud, comment as comment_crud, stats as stats_crud
+from app.crud import export as export_crud, image as image_crud
 
 router = APIRouter()
 
+# 统计概览
+@router.get("/stats", response_model=AdminStats)
+async def get_stats(
+    days: int = Query(30, ge=1, le=365),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """获取全站统计（从汇总表读取，不扫描基础表）"""
+    return {
+        "totals": stats_crud.get_totals(db),
+        "daily": stats_crud.get_daily_stats(db, days=days)
+    }
+
 # 用户管理
 @router.get("/users", response_model=List[User])
 async def get_all_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="用户名或邮箱前缀"),
+    role: Optional[UserRole] = Query(None),
+    is_blocked: Optional[bool] = Query(None),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """获取所有用户"""
-    users = user_crud.get_users(db, skip=skip, limit=limit)
+    users = user_crud.get_users(db, skip=skip, limit=limit, q=q, role=role, is_blocked=is_blocked)
     return users
 
+@router.post("/users/bulk", response_model=BulkUserCreateResult)
+def bulk_create_users(
+    data: BulkUserCreate,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """批量创建用户，返回每一行的结果（同步路由，在线程池中执行，不阻塞事件循环）"""
+    if not data.users:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="用户列表不能为空")
+    if len(data.users) > settings.bulk_user_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多创建 {settings.bulk_user_max} 个用户"
+        )
+    return user_crud.bulk_create_users(db, data.users)
+
 @router.put("/users/{user_id}/block")
 async def block_user(
     user_id: str,
@@ -57,7 +96,7 @@ async def get_all_posts(
 ):
     """获取所有帖子（包括隐藏的）"""
     posts = post_crud.get_all_posts(db, skip=skip, limit=limit)
-    return posts
+    return image_crud.attach_image_metadata(db, posts)
 
 @router.put("/posts/{post_id}/hide")
 async def hide_post(
@@ -117,4 +156,42 @@ async def delete_comment_admin(
     success = comment_crud.delete_comment(db, comment_id=comment_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="评论未找到")
-    return {"message": "评论已删除"}
\ No newline at end of file
+    return {"message": "评论已删除"}
+
+# 在线备份
+@router.post("/backup", status_code=status.HTTP_202_ACCEPTED)
+async def start_backup(admin_user: User = Depends(get_admin_user)):
+    """在后台开始在线备份数据库和上传文件，进度和结果通过 GET /backup 查询"""
+    if not backup.start_backup_job():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="备份正在进行中")
+    return {"message": "备份已开始"}
+
+@router.get("/backup")
+async def get_backup_status(admin_user: User = Depends(get_admin_user)):
+    """获取最近一次备份的状态：耗时、校验结果、复制的文件数和备份期间 API 提交的耗时（commit_latency_ms）"""
+    return backup.get_backup_job()
+
+# 数据导出
+@router.get("/export/{table}")
+def export_table(
+    table: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="创建时间下限（含）"),
+    until: Optional[datetime] = Query(None, description="创建时间上限（不含）"),
+    hidden: Optional[bool] = Query(None, description="帖子/评论按隐藏状态筛选，用户按屏蔽状态筛选"),
+    gzip: bool = Query(True, description="gzip 压缩输出"),
+    admin_user: User = Depends(get_admin_user)
+):
+    """流式导出帖子、评论或用户（NDJSON/CSV），内存占用与表大小无关"""
+    if table not in export_crud.EXPORTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="不支持导出该数据")
+    
+    filename = export_crud.export_filename(table, format, gzip)
+    media_type = "application/gzip" if gzip else (
+        "application/x-ndjson" if format == "ndjson" else "text/csv; charset=utf-8"
+    )
+    return StreamingResponse(
+        export_crud.iter_export(table, format, since=since, until=until, hidden=hidden, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
\ No newline at end of file
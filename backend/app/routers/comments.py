@@ -1,26 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.comment_broker import comment_broker, TooManyConnections
 from app.dependencies.auth import get_current_active_user
 from app.schemas.comment import Comment, CommentCreate, CommentUpdate
 from app.schemas.user import User
-from app.crud import comment as comment_crud, post as post_crud
+from app.crud import comment as comment_crud, post as post_crud, archive as archive_crud
 
 router = APIRouter()
 
+class _SubscriptionResponse(StreamingResponse):
+    """响应结束时退订，无论是否开始迭代事件流"""
+
+    def __init__(self, subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # 客户端在生成器开始迭代前断开或发送失败时，生成器中的 finally 不会执行（退订是幂等的）
+            comment_broker.unsubscribe(self.subscription)
+
 @router.get("/post/{post_id}", response_model=List[Comment])
 async def get_post_comments(post_id: str, db: Session = Depends(get_db)):
     """获取帖子的评论"""
-    # 检查帖子是否存在
+    # 检查帖子是否存在，已归档的帖子从归档表读取评论
     post = post_crud.get_post(db, post_id=post_id)
     if post is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
+        if archive_crud.get_archived_post(db, post_id=post_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
+        return archive_crud.get_archived_post_comments(db, post_id=post_id)
     
     comments = comment_crud.get_post_comments(db, post_id=post_id)
     return comments
 
+@router.get("/post/{post_id}/stream")
+async def stream_post_comments(
+    post_id: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="断线续传游标，也可以通过 Last-Event-ID 请求头传入")
+):
+    """以 SSE 推送帖子评论的创建、编辑、隐藏和删除事件，替代轮询"""
+    # 不使用 get_db 依赖：长连接期间不应占用数据库连接
+    db = SessionLocal()
+    try:
+        post = post_crud.get_post(db, post_id=post_id)
+    finally:
+        db.close()
+    if post is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
+    
+    try:
+        subscription = comment_broker.subscribe(post_id)
+    except TooManyConnections:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="推送连接数已达上限",
+            headers={"Retry-After": str(int(settings.comment_stream_heartbeat))}
+        )
+    
+    cursor = cursor or request.headers.get("last-event-id")
+    return _SubscriptionResponse(
+        subscription,
+        comment_broker.event_stream(subscription, cursor, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/post/{post_id}", response_model=Comment)
 async def create_comment(
     post_id: str,
@@ -34,6 +86,13 @@ async def create_comment(
     if post is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
     
+    if settings.write_coalescing_enabled:
+        return await comment_crud.create_comment_coalesced(
+            comment=comment_data,
+            post_id=post_id,
+            author_id=current_user.id
+        )
+    
     comment = comment_crud.create_comment(
         db=db,
         comment=comment_data,
@@ -1,33 +1,104 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.single_flight import post_detail_flight
+from app.core.view_counter import view_counter
 from app.dependencies.auth import get_current_active_user
-from app.schemas.post import Post, PostCreate, PostUpdate, PostWithComments
+from app.schemas.post import Post, PostCreate, PostUpdate, PostWithComments, PostSummary, PostBatch, PostChanges
 from app.schemas.user import User
-from app.crud import post as post_crud
+from app.crud import post as post_crud, image as image_crud, change as change_crud
 
 router = APIRouter()
 
+MAX_BATCH_IDS = 100
+
 @router.get("/", response_model=List[Post])
 async def get_posts(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None, description="搜索关键词，将在标题和内容中搜索"),
+    sort: str = Query("latest", pattern="^(latest|trending)$", description="排序方式：latest 最新，trending 热门（搜索时忽略）"),
     db: Session = Depends(get_db)
 ):
     """获取帖子列表"""
-    posts = post_crud.get_posts(db, skip=skip, limit=limit, search=search)
-    return posts
+    posts = post_crud.get_posts(db, skip=skip, limit=limit, search=search, sort=sort)
+    return image_crud.attach_image_metadata(db, posts)
+
+@router.get("/batch", response_model=PostBatch)
+async def get_posts_batch(
+    ids: str = Query(..., description=f"逗号分隔的帖子ID，最多 {MAX_BATCH_IDS} 个"),
+    include_comment_count: bool = Query(False, description="附带可见评论数"),
+    db: Session = Depends(get_db)
+):
+    """按ID批量获取帖子，按请求顺序返回，并列出不存在或不可见的ID"""
+    post_ids = list(dict.fromkeys(post_id.strip() for post_id in ids.split(",") if post_id.strip()))
+    if len(post_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多获取 {MAX_BATCH_IDS} 个帖子"
+        )
+    
+    posts_by_id = {post.id: post for post in image_crud.attach_image_metadata(db, post_crud.get_posts_by_ids(db, post_ids))}
+    comment_counts = post_crud.get_comment_counts(db, list(posts_by_id)) if include_comment_count else None
+    
+    posts = []
+    for post_id in post_ids:
+        post = posts_by_id.get(post_id)
+        if post is None:
+            continue
+        summary = PostSummary.model_validate(post)
+        if comment_counts is not None:
+            summary.comment_count = comment_counts.get(post_id, 0)
+        posts.append(summary)
+    
+    return {
+        "posts": posts,
+        "missing": [post_id for post_id in post_ids if post_id not in posts_by_id]
+    }
+
+@router.get("/changes", response_model=PostChanges)
+async def get_post_changes(
+    since: Optional[int] = Query(None, ge=0, description="上次返回的 cursor；不传时只返回当前游标，用于全量同步前记录起点"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """增量同步：返回游标之后新建、编辑、隐藏或删除的帖子，post 为空时客户端应删除本地副本"""
+    if since is None:
+        return {"changes": [], "cursor": change_crud.get_latest_cursor(db), "has_more": False}
+    if change_crud.is_cursor_expired(db, since):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="游标已过期，请重新全量同步")
+    
+    changes, cursor, has_more = change_crud.get_changes(db, since=since, limit=limit)
+    image_crud.attach_image_metadata(db, [item["post"] for item in changes if item["post"] is not None])
+    return {"changes": changes, "cursor": cursor, "has_more": has_more}
+
+def _load_post_detail(post_id: str) -> bytes:
+    """查询并序列化帖子详情；在线程池中执行，使用独立的会话，结果由并发的相同请求共享"""
+    db = SessionLocal()
+    try:
+        post = post_crud.get_post_with_comments(db, post_id=post_id)
+        if post is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
+        image_crud.attach_image_metadata(db, [post])
+        return PostWithComments.model_validate(post).model_dump_json().encode()
+    finally:
+        db.close()
 
 @router.get("/{post_id}", response_model=PostWithComments)
-async def get_post(post_id: str, db: Session = Depends(get_db)):
-    """获取帖子详情"""
-    post = post_crud.get_post_with_comments(db, post_id=post_id)
-    if post is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="帖子未找到")
-    return post
+async def get_post(post_id: str):
+    """获取帖子详情（并发的相同请求合并为一次查询）"""
+    load = lambda: run_in_threadpool(_load_post_detail, post_id)
+    if settings.single_flight_enabled:
+        body = await post_detail_flight.do(post_id, load)
+    else:
+        body = await load()
+    view_counter.record(post_id)  # 只计成功的读取；浏览数在内存中累加，由后台任务批量写回
+    return Response(content=body, media_type="application/json")
 
 @router.post("/", response_model=Post)
 async def create_post(
@@ -36,7 +107,11 @@ async def create_post(
     db: Session = Depends(get_db)
 ):
     """创建帖子"""
-    post = post_crud.create_post(db=db, post=post_data, author_id=current_user.id)
+    if settings.write_coalescing_enabled:
+        post = await post_crud.create_post_coalesced(post=post_data, author_id=current_user.id)
+    else:
+        post = post_crud.create_post(db=db, post=post_data, author_id=current_user.id)
+    image_crud.attach_image_metadata(db, [post])
     return post
 
 @router.put("/{post_id}", response_model=Post)
@@ -57,6 +132,7 @@ async def update_post(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权编辑此帖子")
     
     updated_post = post_crud.update_post(db=db, post_id=post_id, post_update=post_update)
+    image_crud.attach_image_metadata(db, [updated_post])
     return updated_post
 
 @router.delete("/{post_id}")
@@ -90,4 +166,4 @@ async def get_user_posts(
 ):
     """获取用户的帖子"""
     posts = post_crud.get_user_posts(db, user_id=user_id, skip=skip, limit=limit)
-    return posts
\ No newline at end of file
+    return image_crud.attach_image_metadata(db, posts)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+
+from app.core.admission import get_admission_stats
+from app.core import invalidation
+from app.core.comment_broker import comment_broker
+from app.core.single_flight import post_detail_flight
+from app.core.view_counter import view_counter
+from app.core.write_coalescer import write_coalescer
+
+router = APIRouter()
+
+@router.get("/admission")
+async def admission_stats():
+    """获取准入控制的队列深度和拒绝计数"""
+    return get_admission_stats()
+
+@router.get("/invalidation")
+async def invalidation_stats():
+    """获取缓存失效广播的发布和接收计数"""
+    return invalidation.bus.stats()
+
+@router.get("/comment-stream")
+async def comment_stream_stats():
+    """获取评论推送的连接数和分发计数"""
+    return comment_broker.stats()
+
+@router.get("/write-coalescer")
+async def write_coalescer_stats():
+    """获取写合并的批次数和平均批大小"""
+    return write_coalescer.stats()
+
+@router.get("/single-flight")
+async def single_flight_stats():
+    """获取帖子详情读合并的执行次数、共享次数和微缓存命中数"""
+    return post_detail_flight.stats()
+
+@router.get("/view-counter")
+async def view_counter_stats():
+    """获取浏览计数的待写回数量和写回次数"""
+    return view_counter.stats()
@@ -1,12 +1,19 @@
 import os
+import shutil
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from typing import List
-from PIL import Image
 
 from app.core.config import settings
+from app.core.database import get_db
+from app.core.images import inspect_image
 from app.dependencies.auth import get_current_active_user
 from app.schemas.user import User
+from app.schemas.post import ImageInfo
+from app.schemas.upload import UploadSessionCreate, UploadSessionStatus
+from app.crud import image as image_crud, upload as upload_crud
 
 router = APIRouter()
 
@@ -27,12 +34,16 @@ def validate_image(file: UploadFile) -> bool:
     
     return True
 
+def _image_info(url: str, meta: dict) -> ImageInfo:
+    return ImageInfo(url=url, width=meta["width"], height=meta["height"], format=meta["format"], placeholder=meta["placeholder"])
+
 @router.post("/image")
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
-    """上传图片"""
+    """上传图片，返回URL以及尺寸、格式和占位图"""
     # 验证文件
     if not validate_image(file):
         raise HTTPException(
@@ -54,10 +65,9 @@ async def upload_image(
         with open(file_path, "wb") as f:
             f.write(contents)
         
-        # 验证图片文件是否可以打开
+        # 在线程池中验证图片，并顺带提取尺寸、格式和占位图
         try:
-            with Image.open(file_path) as img:
-                img.verify()
+            meta = await run_in_threadpool(inspect_image, file_path)
         except Exception:
             # 如果不是有效图片，删除文件
             os.remove(file_path)
@@ -66,10 +76,13 @@ async def upload_image(
                 detail="文件不是有效的图片格式"
             )
         
-        # 返回文件URL
+        # 保存元数据并返回文件URL
         file_url = f"/uploads/{unique_filename}"
-        return {"url": file_url}
+        image_crud.save_image_metadata(db, {file_url: meta}, uploader_id=current_user.id)
+        return _image_info(file_url, meta)
     
+    except HTTPException:
+        raise
     except Exception as e:
         # 如果保存失败，确保清理文件
         if os.path.exists(file_path):
@@ -82,9 +95,10 @@ async def upload_image(
 @router.post("/images")
 async def upload_images(
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
-    """批量上传图片"""
+    """批量上传图片，返回URL列表以及每张图片的尺寸、格式和占位图"""
     if len(files) > 10:  # 限制最多10张图片
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -92,6 +106,7 @@ async def upload_images(
         )
     
     uploaded_urls = []
+    uploaded_meta = {}
     uploaded_files = []  # 用于错误时清理
     
     try:
@@ -122,10 +137,9 @@ async def upload_images(
             
             uploaded_files.append(file_path)
             
-            # 验证图片文件是否可以打开
+            # 在线程池中验证图片，并顺带提取尺寸、格式和占位图
             try:
-                with Image.open(file_path) as img:
-                    img.verify()
+                meta = await run_in_threadpool(inspect_image, file_path)
             except Exception:
                 # 清理已上传的文件
                 for uploaded_file in uploaded_files:
@@ -139,8 +153,16 @@ async def upload_images(
             # 添加URL到结果列表
             file_url = f"/uploads/{unique_filename}"
             uploaded_urls.append(file_url)
+            uploaded_meta[file_url] = meta
         
-        return {"urls": uploaded_urls}
+        image_crud.save_image_metadata(db, uploaded_meta, uploader_id=current_user.id)
+        return {
+            "urls": uploaded_urls,
+            "images": [
+                _image_info(url, meta)
+                for url, meta in uploaded_meta.items()
+            ]
+        }
     
     except HTTPException:
         raise
@@ -152,4 +174,145 @@ async def upload_images(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="文件批量上传失败"
-        )
\ No newline at end of file
+        )
+
+# 断点续传：创建会话 -> 按偏移量 PUT 分片（可并行、可重传） -> 查询进度 -> 完成
+# 分片直接写入预分配的临时文件，图片校验只在完成时执行一次
+
+def _session_status(db: Session, db_session) -> UploadSessionStatus:
+    ranges = upload_crud.get_received_ranges(db, db_session.id)
+    return UploadSessionStatus(
+        id=db_session.id,
+        filename=db_session.filename,
+        size=db_session.size,
+        offset=upload_crud.contiguous_offset(ranges),
+        received=sum(end - start for start, end in ranges),
+        missing=[list(missing) for missing in upload_crud.missing_ranges(ranges, db_session.size)],
+        chunk_size=settings.upload_chunk_size
+    )
+
+def _get_own_session(db: Session, session_id: str, current_user: User):
+    db_session = upload_crud.get_session(db, session_id, current_user.id)
+    if db_session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="上传会话不存在或已过期")
+    return db_session
+
+@router.post("/sessions", response_model=UploadSessionStatus, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """创建断点续传会话"""
+    file_ext = os.path.splitext(session_data.filename)[1].lower()
+    if file_ext not in settings.allowed_extensions or session_data.size > settings.max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的图片文件或文件过大"
+        )
+    if upload_crud.count_user_sessions(db, current_user.id) >= settings.upload_max_sessions_per_user:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="未完成的上传过多，请先完成或取消已有的上传"
+        )
+    
+    db_session = await run_in_threadpool(
+        upload_crud.create_session, db, current_user.id, session_data.filename, session_data.size
+    )
+    return _session_status(db, db_session)
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionStatus)
+async def get_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """查询上传进度，断线后据此续传"""
+    return _session_status(db, _get_own_session(db, session_id, current_user))
+
+@router.put("/sessions/{session_id}", response_model=UploadSessionStatus)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="分片在文件中的起始位置"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """上传一个分片（请求体为分片的原始字节），同一偏移量可以重传"""
+    db_session = _get_own_session(db, session_id, current_user)
+    
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > settings.upload_max_chunk_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"分片不能超过 {settings.upload_max_chunk_size} 字节"
+            )
+    if not data or offset + len(data) > db_session.size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分片为空或超出文件大小"
+        )
+    
+    # 读取请求体期间不持有任何锁，写入前重新确认会话仍然存在
+    try:
+        db_session = await run_in_threadpool(
+            upload_crud.store_chunk, db, session_id, current_user.id, offset, bytes(data)
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="上传会话已完成或已取消")
+    if db_session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="上传会话不存在或已过期")
+    return _session_status(db, db_session)
+
+@router.post("/sessions/{session_id}/complete", response_model=ImageInfo)
+async def complete_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """完成上传：校验图片、提取元数据并移入上传目录"""
+    db_session = _get_own_session(db, session_id, current_user)
+    status_data = _session_status(db, db_session)
+    if status_data.received < db_session.size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"文件尚未上传完整（已收到 {status_data.received}/{db_session.size} 字节）"
+        )
+    
+    file_ext = os.path.splitext(db_session.filename)[1].lower()
+    if not upload_crud.claim_session(db, session_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="上传会话不存在或已过期")
+    
+    tmp_path = upload_crud.tmp_file_path(session_id)
+    if not os.path.exists(tmp_path):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="临时文件已不存在，请重新上传")
+    try:
+        meta = await run_in_threadpool(inspect_image, tmp_path)
+    except Exception:
+        upload_crud.remove_tmp_file(session_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="文件不是有效的图片格式"
+        )
+    
+    os.makedirs(settings.upload_path, exist_ok=True)
+    unique_filename = f"{uuid.uuid4()}{file_ext}"
+    await run_in_threadpool(shutil.move, tmp_path, os.path.join(settings.upload_path, unique_filename))
+    
+    file_url = f"/uploads/{unique_filename}"
+    image_crud.save_image_metadata(db, {file_url: meta}, uploader_id=current_user.id)
+    return _image_info(file_url, meta)
+
+@router.delete("/sessions/{session_id}")
+async def cancel_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """取消上传并删除临时文件"""
+    _get_own_session(db, session_id, current_user)
+    if not upload_crud.delete_session(db, session_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="上传会话正在完成，无法取消")
+    return {"message": "上传已取消"}
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.database import get_db
+from app.dependencies.auth import get_current_active_user
+from app.schemas.user import User, UserBrief
+from app.crud import user as user_crud
+
+router = APIRouter()
+
+@router.get("/typeahead", response_model=List[UserBrief])
+async def typeahead(
+    q: str = Query(..., min_length=1, max_length=50, description="用户名前缀"),
+    limit: int = Query(10, ge=1, le=20),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """按用户名前缀提示用户（用于@提及）"""
+    return user_crud.search_usernames(db, prefix=q, limit=limit)
\ No newline at end of file
@@ -1,12 +1,18 @@
-from .user import User, UserCreate, UserLogin, Token, TokenData
-from .post import Post, PostCreate, PostUpdate, PostWithComments
+from .user import User, UserBrief, UserCreate, UserLogin, Token, TokenData, BulkUserCreate, BulkUserResult, BulkUserCreateResult
+from .post import Post, PostCreate, PostUpdate, PostWithComments, PostSummary, PostBatch, ImageInfo, PostChange, PostChanges
 from .comment import Comment, CommentCreate, CommentUpdate
+from .stats import AdminStats, StatTotals, DailyStat
+from .upload import UploadSessionCreate, UploadSessionStatus
 
 # 解决前向引用问题
 PostWithComments.model_rebuild()
 
 __all__ = [
-    "User", "UserCreate", "UserLogin", "Token", "TokenData",
-    "Post", "PostCreate", "PostUpdate", "PostWithComments", 
-    "Comment", "CommentCreate", "CommentUpdate"
+    "User", "UserBrief", "UserCreate", "UserLogin", "Token", "TokenData",
+    "BulkUserCreate", "BulkUserResult", "BulkUserCreateResult",
+    "Post", "PostCreate", "PostUpdate", "PostWithComments", "PostSummary", "PostBatch", "ImageInfo",
+    "PostChange", "PostChanges",
+    "Comment", "CommentCreate", "CommentUpdate",
+    "AdminStats", "StatTotals", "DailyStat",
+    "UploadSessionCreate", "UploadSessionStatus"
 ]
\ No newline at end of file
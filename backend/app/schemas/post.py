@@ -19,17 +19,48 @@ class PostUpdate(BaseModel):
     content: Optional[str] = None
     image_urls: Optional[List[str]] = None
 
+class ImageInfo(BaseModel):
+    """图片尺寸、格式和占位图；上传前已有的图片只有 url"""
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: Optional[str] = None
+    placeholder: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
 class Post(PostBase):
     id: str
     author_id: str
     is_hidden: bool
+    views: int = 0  # 定期批量写回，可能比实际浏览数略少
     created_at: datetime
     updated_at: Optional[datetime]
     author: User
+    images: List[ImageInfo] = []
     
     class Config:
         from_attributes = True
 
+class PostSummary(Post):
+    comment_count: Optional[int] = None
+
+class PostBatch(BaseModel):
+    posts: List[PostSummary]
+    missing: List[str]
+
+class PostChange(BaseModel):
+    seq: int
+    post_id: str
+    op: str  # created / updated / hidden / deleted / archived
+    post: Optional[Post] = None  # 帖子当前的可见状态，已隐藏或删除时为空
+
+class PostChanges(BaseModel):
+    changes: List[PostChange]
+    cursor: int  # 下次请求的 since
+    has_more: bool
+
 class PostWithComments(Post):
     comments: List['Comment'] = []
     
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+class StatTotals(BaseModel):
+    users: int = 0
+    blocked_users: int = 0
+    posts: int = 0
+    hidden_posts: int = 0
+    comments: int = 0
+    hidden_comments: int = 0
+
+class DailyStat(BaseModel):
+    day: date
+    signups: int
+    posts: int
+    comments: int
+    
+    class Config:
+        from_attributes = True
+
+class AdminStats(BaseModel):
+    totals: StatTotals
+    daily: List[DailyStat]
\ No newline at end of file
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., max_length=255)
+    size: int = Field(..., gt=0, description="文件总字节数")
+
+class UploadSessionStatus(BaseModel):
+    id: str
+    filename: str
+    size: int
+    offset: int  # 从文件开头起连续收到的字节数
+    received: int  # 收到的总字节数（并行上传时可能大于 offset）
+    missing: List[List[int]]  # 尚未收到的 [start, end) 区间
+    chunk_size: int  # 建议的分片大小
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from app.models.user import UserRole
 
 class UserBase(BaseModel):
@@ -10,6 +10,23 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate]
+
+class BulkUserResult(BaseModel):
+    index: int  # 在请求中的位置
+    username: str
+    email: str
+    status: str  # created / error
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkUserCreateResult(BaseModel):
+    created: int
+    failed: int
+    timings: Dict[str, float]  # 各阶段耗时（秒）：check / hash / insert
+    results: List[BulkUserResult]
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -23,6 +40,13 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserBrief(BaseModel):
+    id: str
+    username: str
+    
+    class Config:
+        from_attributes = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,26 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, Base
+from app.crud.archive import archive_old_posts
+import app.models  # noqa: F401  注册全部模型，确保归档表已创建
+
+def main():
+    parser = argparse.ArgumentParser(description="把旧帖子及其评论分批移入归档表")
+    parser.add_argument("--days", type=int, default=settings.archive_after_days, help="归档创建时间早于多少天的帖子")
+    parser.add_argument("--batch-size", type=int, default=200, help="每个事务归档的帖子数")
+    parser.add_argument("--sleep", type=float, default=0.05, help="批次之间的暂停秒数")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    before = datetime.now(timezone.utc) - timedelta(days=args.days)
+    db = SessionLocal()
+    try:
+        total = archive_old_posts(db, before, batch_size=args.batch_size, sleep=args.sleep)
+    finally:
+        db.close()
+    print(f"归档完成：共 {total} 个帖子（早于 {before:%Y-%m-%d}）")
+
+if __name__ == "__main__":
+    main()
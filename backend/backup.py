@@ -0,0 +1,44 @@
+import argparse
+import sys
+
+from app.core.backup import BackupInProgress, run_backup
+from app.core.config import settings
+
+def main():
+    parser = argparse.ArgumentParser(description="在线备份数据库和上传目录，备份期间 API 照常读写")
+    parser.add_argument("--dest", default=settings.backup_path, help="备份目录")
+    parser.add_argument("--pages", type=int, default=256, help="每步复制的页数")
+    parser.add_argument("--sleep", type=float, default=0.05, help="每步之后暂停的秒数")
+    parser.add_argument("--max-mb-per-sec", type=float, default=settings.backup_max_mb_per_sec or None,
+                        help="复制上传文件的限速（MB/秒）")
+    parser.add_argument("--keep", type=int, default=settings.backup_keep, help="保留的数据库快照数")
+    parser.add_argument("--probe", action="store_true",
+                        help="测量备份期间的写入延迟（探测会频繁获取写锁，给线上增加负载）")
+    args = parser.parse_args()
+
+    try:
+        result = run_backup(
+            dest=args.dest,
+            pages=args.pages,
+            sleep=args.sleep,
+            max_bytes_per_second=args.max_mb_per_sec * 1024 * 1024 if args.max_mb_per_sec else None,
+            keep=args.keep,
+            probe=args.probe
+        )
+    except BackupInProgress:
+        print(f"{args.dest} 已有备份在进行中", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"快照: {result.snapshot}（{result.journal_mode} 模式，重新复制 {result.restarts} 次，校验 {result.integrity}）")
+    print(f"上传文件: 复制 {result.files_copied} 个（{result.bytes_copied / 1024 / 1024:.1f} MB），跳过 {result.files_skipped} 个")
+    print(f"耗时: 数据库 {result.db_seconds:.1f} 秒，文件 {result.files_seconds:.1f} 秒，共 {result.elapsed:.1f} 秒")
+    if result.write_latency_ms.get("samples"):
+        latency = result.write_latency_ms
+        print(f"备份期间写锁等待: p50 {latency['p50']} 毫秒，p99 {latency['p99']} 毫秒，最大 {latency['max']} 毫秒")
+    for name, error in result.errors.items():
+        print(f"复制失败 {name}: {error}", file=sys.stderr)
+    if result.errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import tempfile
+import time
+
+# 基准测试使用临时数据库，必须在导入应用模块之前设置
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from app.core.database import Base, engine, SessionLocal
+from app.core.security import get_password_hash, shutdown_hash_pool, hash_workers
+from app.crud import user as user_crud
+from app.schemas.user import UserCreate
+import app.models  # noqa: F401  注册全部模型
+
+def make_users(prefix: str, count: int) -> list:
+    return [
+        UserCreate(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password=f"password-{i}")
+        for i in range(count)
+    ]
+
+def run_serial(users: list) -> float:
+    """与 /api/auth/register 相同：两次存在性查询、一次哈希、单行提交"""
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        for user in users:
+            if user_crud.get_user_by_username(db, user.username) or user_crud.get_user_by_email(db, user.email):
+                raise RuntimeError("用户已存在")
+            user_crud.create_user(db, user)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+def run_bulk(users: list, rounds) -> tuple:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        outcome = user_crud.bulk_create_users(db, users, rounds=rounds)
+        return time.perf_counter() - start, outcome
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="批量创建用户吞吐量：逐个注册 vs 批量创建")
+    parser.add_argument("--users", type=int, default=10000, help="批量创建的用户数")
+    parser.add_argument("--existing", type=int, default=10000, help="预先存在的用户数（冲突检查查询的表大小）")
+    parser.add_argument("--sample", type=int, default=50, help="逐个注册的样本数，按其速率推算同等数量的耗时")
+    parser.add_argument("--rounds", type=int, default=None, help="批量创建使用的 bcrypt 轮数（默认与线上相同；设为 4 只测数据库部分）")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_bulk(make_users("existing", args.existing), rounds=4)
+
+    start = time.perf_counter()
+    for i in range(5):
+        get_password_hash(f"warmup-{i}")
+    hash_cost = (time.perf_counter() - start) / 5
+
+    serial = run_serial(make_users("serial", args.sample)) / args.sample
+    elapsed, outcome = run_bulk(make_users("bulk", args.users), args.rounds)
+    shutdown_hash_pool()
+    timings = outcome["timings"]
+    # 进程池启动计入哈希阶段；数据库部分与 bcrypt 轮数无关
+    database = timings["check"] + timings["insert"]
+
+    print(f"已有 {args.existing} 个用户，CPU 核数 {os.cpu_count()}，哈希进程数 {hash_workers()}")
+    print(f"单次 bcrypt 哈希:  {hash_cost * 1000:8.1f} 毫秒")
+    print(f"逐个注册:          {1 / serial:8.1f} 个/秒  （数据库部分约 {(serial - hash_cost) * 1000:.2f} 毫秒/个，"
+          f"{args.users} 个预计 {serial * args.users:.0f} 秒）")
+    print(f"批量创建:          {outcome['created'] / elapsed:8.1f} 个/秒  （{args.users} 个共 {elapsed:.1f} 秒，"
+          f"rounds={args.rounds or '默认'}）")
+    print(f"  冲突检查 {timings['check']:.3f} 秒，哈希 {timings['hash']:.2f} 秒，插入 {timings['insert']:.3f} 秒")
+    print(f"  数据库部分 {database * 1000 / args.users:.3f} 毫秒/个")
+
+if __name__ == "__main__":
+    main()
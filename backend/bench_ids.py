@@ -0,0 +1,81 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from app.core.ids import uuid7
+
+# 与迁移前后的表结构一致：主键 + 带索引的外键
+SCHEMAS = {
+    "uuid4 文本": ("VARCHAR", lambda: str(uuid.uuid4())),
+    "uuid7 二进制": ("BLOB", lambda: uuid7().bytes),
+}
+
+def create_tables(conn: sqlite3.Connection, id_type: str):
+    conn.execute(f"CREATE TABLE posts (id {id_type} NOT NULL PRIMARY KEY, author_id {id_type} NOT NULL, title VARCHAR(200))")
+    conn.execute(f"CREATE TABLE comments (id {id_type} NOT NULL PRIMARY KEY, post_id {id_type} NOT NULL, content TEXT)")
+    conn.execute("CREATE INDEX ix_posts_author_id ON posts (author_id)")
+    conn.execute("CREATE INDEX ix_comments_post_id ON comments (post_id)")
+
+def index_sizes(conn: sqlite3.Connection) -> dict:
+    """各表和索引占用的字节数（dbstat 虚拟表）"""
+    return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+
+def run(label: str, id_type: str, make_id, rows: int, batch_size: int, cache_mb: int, directory: str) -> dict:
+    path = os.path.join(directory, f"{id_type}.db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA cache_size = -{cache_mb * 1024}")  # 缓存远小于索引时，随机插入的代价才会显现
+    create_tables(conn, id_type)
+
+    authors = [make_id() for _ in range(1000)]
+    rates = []
+    start = time.perf_counter()
+    for batch_start in range(0, rows, batch_size):
+        batch_began = time.perf_counter()
+        posts = [(make_id(), authors[i % len(authors)], "title") for i in range(batch_start, batch_start + batch_size)]
+        comments = [(make_id(), post_id, "content") for post_id, _, _ in posts]
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO posts VALUES (?, ?, ?)", posts)
+        conn.executemany("INSERT INTO comments VALUES (?, ?, ?)", comments)
+        conn.execute("COMMIT")
+        rates.append(2 * batch_size / (time.perf_counter() - batch_began))
+    elapsed = time.perf_counter() - start
+
+    sizes = index_sizes(conn)
+    conn.close()
+    tail = rates[-max(1, len(rates) // 10):]
+    return {
+        "label": label,
+        "rate": 2 * rows / elapsed,
+        "tail_rate": sum(tail) / len(tail),
+        "sizes": sizes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="主键格式基准：uuid4 文本 vs uuid7 二进制的插入速率和索引大小")
+    parser.add_argument("--rows", type=int, default=200_000, help="插入的帖子数（每个帖子一条评论）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每个事务插入的帖子数")
+    parser.add_argument("--cache-mb", type=int, default=8, help="SQLite 页缓存大小")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            run(label, id_type, make_id, args.rows, args.batch_size, args.cache_mb, directory)
+            for label, (id_type, make_id) in SCHEMAS.items()
+        ]
+
+    names = ["posts", "sqlite_autoindex_posts_1", "ix_posts_author_id", "comments", "sqlite_autoindex_comments_1", "ix_comments_post_id"]
+    print(f"{'':<28}" + "".join(f"{result['label']:>16}" for result in results))
+    print(f"{'插入速率（行/秒）':<24}" + "".join(f"{result['rate']:>16,.0f}" for result in results))
+    print(f"{'最后 10% 批次速率（行/秒）':<20}" + "".join(f"{result['tail_rate']:>16,.0f}" for result in results))
+    for name in names:
+        print(f"{name + ' (MB)':<28}" + "".join(f"{result['sizes'].get(name, 0) / mb:>16.1f}" for result in results))
+    totals = [sum(result["sizes"].values()) for result in results]
+    print(f"{'数据库总大小 (MB)':<24}" + "".join(f"{total / mb:>16.1f}" for total in totals))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# 基准测试使用临时数据库，必须在导入应用模块之前设置
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+os.environ["ADMISSION_ENABLED"] = "false"  # 只比较读合并本身，不让准入控制排队
+
+import httpx
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import Base, engine, SessionLocal
+from app.core.single_flight import post_detail_flight
+from app.models import User, Post, Comment
+from main import app
+
+queries = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    global queries
+    queries += 1
+
+def setup(comments: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    post = Post(title="bench", content="bench " * 200, author_id=user.id)
+    db.add(post)
+    db.flush()
+    db.add_all(Comment(content=f"comment {i}", post_id=post.id, author_id=user.id) for i in range(comments))
+    db.commit()
+    post_id = post.id
+    db.close()
+    return post_id
+
+async def run(client: httpx.AsyncClient, post_id: str, concurrency: int, duration: float) -> dict:
+    global queries
+    requests = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal requests
+        while time.perf_counter() < deadline:
+            response = await client.get(f"/api/posts/{post_id}")
+            response.raise_for_status()
+            requests += 1
+
+    queries = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"rps": requests / elapsed, "qps": queries / elapsed, "per_request": queries / max(requests, 1)}
+
+async def main_async(args):
+    post_id = setup(args.comments)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        modes = [("逐个查询", False, 0.0), ("读合并", True, 0.0)]
+        if args.ttl:
+            modes.append((f"读合并+缓存{args.ttl}s", True, args.ttl))
+        print(f"帖子含 {args.comments} 条评论，每档运行 {args.duration} 秒")
+        print(f"{'模式':<14}{'并发':>6}{'请求/秒':>10}{'SQL/秒':>10}{'SQL/请求':>10}")
+        for label, enabled, ttl in modes:
+            settings.single_flight_enabled = enabled
+            post_detail_flight.ttl = ttl
+            for concurrency in args.concurrency:
+                post_detail_flight.clear()
+                result = await run(client, post_id, concurrency, args.duration)
+                print(f"{label:<14}{concurrency:>6}{result['rps']:>10.0f}{result['qps']:>10.0f}{result['per_request']:>10.2f}")
+        print(post_detail_flight.stats())
+
+def main():
+    parser = argparse.ArgumentParser(description="帖子详情读合并：数据库查询量随并发数的变化")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--duration", type=float, default=3.0, help="每档运行的秒数")
+    parser.add_argument("--comments", type=int, default=50, help="帖子的评论数")
+    parser.add_argument("--ttl", type=float, default=0.0, help="额外测试带微缓存的读合并")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
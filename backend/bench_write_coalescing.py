@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# 基准测试使用临时数据库，必须在导入应用模块之前设置
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.database import Base, engine, SessionLocal
+from app.core.write_coalescer import write_coalescer
+from app.crud import comment as comment_crud
+from app.models import User, Post
+from app.schemas.comment import CommentCreate
+
+def setup():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    post = Post(title="bench", content="bench", author_id=user.id)
+    db.add(post)
+    db.commit()
+    ids = user.id, post.id
+    db.close()
+    return ids
+
+def create_direct(post_id: str, author_id: str):
+    db = SessionLocal()
+    try:
+        comment_crud.create_comment(db, CommentCreate(content="bench"), post_id, author_id)
+    finally:
+        db.close()
+
+async def run(total: int, concurrency: int, coalesced: bool, post_id: str, author_id: str) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            if coalesced:
+                await comment_crud.create_comment_coalesced(CommentCreate(content="bench"), post_id, author_id)
+            else:
+                await run_in_threadpool(create_direct, post_id, author_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="评论写入吞吐量：单独提交 vs 写合并")
+    parser.add_argument("--total", type=int, default=2000, help="每轮写入的评论数")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发请求数")
+    args = parser.parse_args()
+
+    author_id, post_id = setup()
+    direct = asyncio.run(run(args.total, args.concurrency, False, post_id, author_id))
+    coalesced = asyncio.run(run(args.total, args.concurrency, True, post_id, author_id))
+    write_coalescer.stop()
+
+    print(f"并发 {args.concurrency}，每轮 {args.total} 条评论")
+    print(f"单独提交: {direct:8.0f} 条/秒")
+    print(f"写合并:   {coalesced:8.0f} 条/秒  (平均每批 {write_coalescer.stats()['avg_batch']} 条)")
+    print(f"提升:     {coalesced / direct:8.2f} 倍")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -28,5 +28,9 @@ if not admin_user:
 else:
     print("管理员用户已存在")
 
+# 从基础表重建统计汇总
+from app.crud.stats import rebuild_stats
+rebuild_stats(db)
+
 db.close()
 print("数据库初始化完成！")
\ No newline at end of file
@@ -0,0 +1,42 @@
+import argparse
+import sys
+from datetime import datetime
+
+from app.crud.export import EXPORTS, FORMATS, iter_export, export_filename
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出帖子、评论或用户")
+    parser.add_argument("table", choices=list(EXPORTS))
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="创建时间下限（含），ISO 格式")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="创建时间上限（不含），ISO 格式")
+    parser.add_argument("--hidden", type=parse_bool, help="帖子/评论按隐藏状态筛选，用户按屏蔽状态筛选")
+    parser.add_argument("--no-gzip", action="store_true", help="不压缩输出")
+    parser.add_argument("-o", "--output", help="输出文件，默认按表名和格式命名，- 表示标准输出")
+    args = parser.parse_args()
+
+    compress = not args.no_gzip
+    output = args.output or export_filename(args.table, args.format, compress)
+    chunks = iter_export(
+        args.table, args.format,
+        since=args.since, until=args.until, hidden=args.hidden, compress=compress
+    )
+
+    total = 0
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            total += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    if output != "-":
+        print(f"已导出 {args.table} 到 {output}（{total} 字节）")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,9 +1,17 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
-from app.routers import auth, posts, comments, admin, upload
+from app.core import invalidation, background, security
+from app.core.admission import AdmissionControlMiddleware
+from app.core.view_counter import view_counter
+from app.core.warmup import warmup_state, run_warmup
+from app.core.write_coalescer import write_coalescer
+from app.crud import trending, upload as upload_crud, change as change_crud
+from app.routers import auth, users, posts, comments, admin, upload, system
 
 app = FastAPI(
     title="发帖网站 API",
@@ -11,6 +19,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 准入控制（放在 CORS 内层，保证 503 响应也带有 CORS 头）
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS配置
 app.add_middleware(
     CORSMiddleware,
@@ -25,15 +36,55 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 # 路由
 app.include_router(auth.router, prefix="/api/auth", tags=["认证"])
+app.include_router(users.router, prefix="/api/users", tags=["用户"])
 app.include_router(posts.router, prefix="/api/posts", tags=["帖子"])
 app.include_router(comments.router, prefix="/api/comments", tags=["评论"])
 app.include_router(upload.router, prefix="/api/upload", tags=["上传"])
 app.include_router(admin.router, prefix="/api/admin", tags=["管理"])
+app.include_router(system.router, prefix="/api/system", tags=["系统"])
+
+@app.on_event("startup")
+async def start_invalidation_bus():
+    invalidation.bus.start()
+
+@app.on_event("shutdown")
+async def stop_invalidation_bus():
+    invalidation.bus.stop()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # 首次执行时会从基础表初始化热门表
+    background.start_periodic("trending-decay", settings.trending_decay_interval, trending.run_decay_pass, run_immediately=True)
+    background.start_periodic("upload-session-gc", settings.upload_session_gc_interval, upload_crud.cleanup_expired_sessions)
+    background.start_periodic("post-changes-compaction", settings.post_changes_compaction_interval, change_crud.compact_post_changes)
+    background.start_periodic("view-counter-flush", settings.view_flush_interval, view_counter.flush)
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await background.stop_all()
+    write_coalescer.stop()
+    await run_in_threadpool(view_counter.flush)  # 写回最后一个周期累计的浏览数
+    security.shutdown_hash_pool()
+
+@app.on_event("startup")
+async def warmup():
+    # 不等待预热完成：启动钩子返回后 uvicorn 才开始接受连接，预热期间 /ready 返回 503
+    background.start_once("warmup", run_warmup)
 
 @app.get("/")
 async def root():
     return {"message": "发帖网站 API"}
 
+@app.get("/ready")
+async def ready():
+    """就绪检查：预热完成前返回 503，滚动发布时不会把流量导向冷进程"""
+    status_code = 200 if warmup_state["ready"] else 503
+    return JSONResponse(status_code=status_code, content=warmup_state)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if settings.workers > 1:
+        # 多进程模式需要以导入字符串的方式传入应用，各进程的缓存通过失效广播保持一致
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=settings.workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import argparse
+
+from app.migrations import MIGRATIONS, run_migration, get_status, connect
+
+def main():
+    parser = argparse.ArgumentParser(description="分批、可恢复的在线数据库迁移")
+    parser.add_argument("names", nargs="*", help="要执行的迁移名称，默认按顺序执行全部")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批处理的行数")
+    parser.add_argument("--sleep", type=float, default=0.05, help="每批之间暂停的秒数，给 API 让出数据库")
+    parser.add_argument("--status", action="store_true", help="只显示迁移状态")
+    args = parser.parse_args()
+
+    if args.status:
+        conn = connect()
+        try:
+            for item in get_status(conn, MIGRATIONS):
+                print(f"{item['name']:<24} {item['status']:<8} {item['rows_done']}/{item['total_rows']}  {item['description']}")
+        finally:
+            conn.close()
+        return
+
+    migrations = [m for m in MIGRATIONS if not args.names or m.name in args.names]
+    unknown = set(args.names) - {m.name for m in MIGRATIONS}
+    if unknown:
+        parser.error(f"未知的迁移: {', '.join(sorted(unknown))}")
+
+    for migration in migrations:
+        run_migration(migration, batch_size=args.batch_size, sleep=args.sleep)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import argparse
+import sys
+
+from app.core.database import SessionLocal
+from app.crud.stats import rebuild_stats, check_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="重建或检查管理后台统计汇总表")
+    parser.add_argument("--check", action="store_true", help="只检查汇总表与基础表是否一致，不修改数据")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            problems = check_stats(db)
+            if problems:
+                print("统计汇总不一致：")
+                for problem in problems:
+                    print(f"  {problem}")
+                sys.exit(1)
+            print("统计汇总一致")
+        else:
+            rebuild_stats(db)
+            print("统计汇总重建完成")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
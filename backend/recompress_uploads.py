@@ -0,0 +1,82 @@
+import argparse
+import os
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.recompress import recompress_uploads
+from app.models.image import ImageMeta
+
+def parse_quality(value: str):
+    if value == "keep":
+        return value
+    quality = int(value)
+    if not 1 <= quality <= 95:
+        raise argparse.ArgumentTypeError("质量应在 1-95 之间")
+    return quality
+
+class MetadataUpdater:
+    """把替换后的文件大小和尺寸（按 EXIF 方向旋转后可能互换）批量写回图片元数据"""
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = batch_size
+        self.pending = []
+
+    def __call__(self, result):
+        if result.status == "replaced":
+            self.pending.append(result)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        db = SessionLocal()
+        try:
+            for result in self.pending:
+                db.query(ImageMeta).filter(ImageMeta.url == f"/uploads/{result.name}").update(
+                    {"size": result.new_size, "width": result.width, "height": result.height},
+                    synchronize_session=False
+                )
+            db.commit()
+        finally:
+            db.close()
+        self.pending = []
+
+def main():
+    parser = argparse.ArgumentParser(description="用进程池批量重新压缩上传目录中的 JPEG/PNG 图片，只在变小时原子替换")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="进程数")
+    parser.add_argument("--quality", type=parse_quality, default="keep",
+                        help="JPEG 质量 1-95；默认 keep 沿用原图量化表（近似无损），PNG 始终无损")
+    parser.add_argument("--webp", action="store_true", help="同时生成更小的 WebP 副本（<文件名>.webp）")
+    parser.add_argument("--webp-quality", type=int, default=80)
+    parser.add_argument("--max-mb-per-sec", type=float, help="读取速率上限（MB/秒），避免挤占 API 的磁盘 I/O")
+    parser.add_argument("--min-age", type=float, default=60, help="跳过最近多少秒内修改过的文件（可能还在写入）")
+    parser.add_argument("--state", default="recompress_state.jsonl", help="断点续传的状态文件")
+    args = parser.parse_args()
+
+    updater = MetadataUpdater()
+    report = recompress_uploads(
+        settings.upload_path,
+        args.state,
+        workers=args.workers,
+        quality=args.quality,
+        webp=args.webp,
+        webp_quality=args.webp_quality,
+        max_bytes_per_second=args.max_mb_per_sec * 1024 * 1024 if args.max_mb_per_sec else None,
+        min_age=args.min_age,
+        on_result=updater
+    )
+    updater.flush()
+
+    mb = 1024 * 1024
+    saved_percent = report.bytes_saved / report.bytes_before * 100 if report.bytes_before else 0
+    print(f"处理 {report.files} 个文件（替换 {report.replaced}，保留 {report.kept}，失败 {report.failed}，跳过 {report.skipped}），"
+          f"耗时 {report.elapsed:.1f} 秒")
+    print(f"{report.bytes_before / mb:.1f} MB -> {report.bytes_after / mb:.1f} MB，节省 {report.bytes_saved / mb:.1f} MB（{saved_percent:.1f}%）")
+    if args.webp:
+        print(f"WebP 副本共 {report.webp_bytes / mb:.1f} MB")
+    for name, error in report.errors.items():
+        print(f"  失败 {name}: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { AuthToken, LoginData, RegisterData, Post, PostWithComments, PostCreateData, Comment, CommentCreateData, User } from '../types';
+import { AuthToken, LoginData, RegisterData, Post, PostWithComments, PostCreateData, Comment, CommentCreateData, User, ImageInfo } from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
 
@@ -68,6 +68,10 @@ export const postsApi = {
 export const commentsApi = {
   getPostComments: (postId: string): Promise<Comment[]> =>
     api.get(`/comments/post/${postId}`).then(res => res.data),
+
+  // 订阅评论实时推送（SSE），浏览器断线重连时会自动带上 Last-Event-ID 续传
+  subscribePostComments: (postId: string): EventSource =>
+    new EventSource(`${API_BASE_URL}/comments/post/${postId}/stream`),
   
   createComment: (postId: string, data: CommentCreateData): Promise<Comment> =>
     api.post(`/comments/post/${postId}`, data).then(res => res.data),
@@ -83,7 +87,7 @@ export const commentsApi = {
 };
 
 export const uploadApi = {
-  uploadImage: (file: File): Promise<{ url: string }> => {
+  uploadImage: (file: File): Promise<ImageInfo> => {
     const formData = new FormData();
     formData.append('file', file);
     return api.post('/upload/image', formData, {
@@ -91,7 +95,7 @@ export const uploadApi = {
     }).then(res => res.data);
   },
   
-  uploadImages: (files: File[]): Promise<{ urls: string[] }> => {
+  uploadImages: (files: File[]): Promise<{ urls: string[]; images: ImageInfo[] }> => {
     const formData = new FormData();
     files.forEach(file => {
       formData.append('files', file);
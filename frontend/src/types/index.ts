@@ -7,6 +7,14 @@ export interface User {
   created_at: string;
 }
 
+export interface ImageInfo {
+  url: string;
+  width?: number;
+  height?: number;
+  format?: string;
+  placeholder?: string;
+}
+
 export interface Post {
   id: string;
   title: string;
@@ -17,6 +25,8 @@ export interface Post {
   created_at: string;
   updated_at?: string;
   author: User;
+  images?: ImageInfo[];
+  views?: number;
 }
 
 export interface PostWithComments extends Post {